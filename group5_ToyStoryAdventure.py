@@ -1,348 +1,123 @@
+import os
+import sys
+
+# The render benchmark runs without a display - PyOpenGL must pick EGL before it loads
+if '--benchmark' in sys.argv:
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+    os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
+import argparse
+import atexit
+import ctypes
+import json
 import math
-import random
+import re
+import time
 
-# Game state
-game_state = "menu"  # "menu", "level_select", "fade", "playing", "game_over"
+import group5_ToyStorySimulation as simulation
+from group5_ToyStorySimulation import EnemyArrays, GameState, lasso_attack_duration, level_configs
+
+# Game state - everything the simulation reads and writes lives in one GameState
+game = GameState()
 fade_alpha = 0
 fade_timer = 0
 selected_level = 1  # Which level player chose (1, 2, or 3)
-current_level = 1  # Currently playing level
-
-# Level display
-show_level_text = True
-level_text_timer = 0
-level_text_duration = 600  # 10 seconds at 60 FPS
-
-# Level-specific configurations
-level_configs = {
-    1: {
-        'total_rooms': 7,  # 6 regular rooms (0-5) + 1 boss room (6)
-        'wall_color': (0.3, 0.5, 0.8),  # Blue walls
-        'floor_color': (0.4, 0.4, 0.4),  # Gray floor
-        'enemy_color': (0.2, 0.8, 0.2),  # Green army men
-        'enemy_name': 'green_army',
-        'boss_name': 'potato_head',
-        'rescue_character': 'jessie',
-        'special_powers_enabled': False,  # No Jessie/Buzz powers
-        'enemy_min': 5,
-        'enemy_max': 10
-    },
-    2: {
-        'total_rooms': 10,  # 9 regular rooms (0-8) + 1 boss room (9)
-        'wall_color': (0.2, 0.7, 0.3),  # Green walls
-        'floor_color': (0.4, 0.4, 0.4),  # Gray floor
-        'enemy_color': (0.9, 0.2, 0.2),  # Red monkeys
-        'enemy_name': 'red_monkey',
-        'boss_name': 'lotso',
-        'rescue_character': 'buzz',
-        'special_powers_enabled': 'jessie_only',  # Only Jessie power, no Buzz
-        'enemy_min': 5,
-        'enemy_max': 15
-    },
-    3: {
-        'total_rooms': 15,
-        'wall_color': (0.4, 0.4, 0.4),
-        'floor_color': (0.3, 0.3, 0.3),
-        'enemy_color': (0.6, 0.6, 0.65),
-        'enemy_name': 'benson',
-        'boss_name': 'gabby',
-        'rescue_character': 'bo_peep',
-        'special_powers_enabled': True,
-        'enemy_min': 5,
-        'enemy_max': 20
-    }
-}
 
-# Game over state
-game_over_timer = 0
-woody_fade_alpha = 1.0  # 1.0 (visible) to 0.0 (invisible)
-show_game_over_text = False
-
-# Room system
-current_room = 0
-total_rooms = 7  # Will be updated based on level
-room_width = 600
-room_length = 600
-
-# Collectibles - stars and hats
-# Generate which rooms have items (stars: 80%, hats: 50-60%)
-random.seed(42)  # Fixed seed for consistent generation
-rooms_with_stars = set()
-rooms_with_hats = set()
-
-# Coin and score system (initialize before use)
-woody_score = 0
-room_coins = {}  # Dictionary mapping room number to list of coin positions
-collected_coins = set()  # Set of (room, coin_index) tuples
-
-# Bensons enemy system (initialize before use)
-room_bensons = {}  # Dictionary mapping room number to list of benson data: [x, y, active, hit_cooldown]
-benson_hit_by_lasso = set()  # Track which bensons have been hit (room, benson_index)
-benson_speed = 0.2  # Very slow movement toward Woody
-bensons_frozen = False  # When Jessie power is active, Bensons freeze
-
-# Jessie special power system
-jessie_power_active = False
-jessie_animation_stage = 0  # 0=inactive, 1=descending, 2=landed, 3=disappearing
-jessie_y_position = 0  # Y position during descent
-jessie_power_cooldown = 0  # Frames until power can be used again
-jessie_power_cooldown_max = 3600  # 1 minute at 60 FPS
-jessie_animation_timer = 0
-
-# Buzz Lightyear special power system
-buzz_power_active = False
-buzz_animation_stage = 0  # 0=inactive, 1=descending, 2=landed, 3=shooting_ray, 4=disappearing
-buzz_y_position = 0  # Y position during descent
-buzz_power_cooldown = 0  # Frames until power can be used again
-buzz_power_cooldown_max = 7200  # 2 minutes at 60 FPS
-buzz_animation_timer = 0
-buzz_ray_alpha = 0.0  # Red ray transparency (0.0 to 1.0)
-
-# Star and hat positions per room
-room_star_positions = {}  # Dictionary mapping room number to (x, y) position
-room_hat_positions = {}  # Dictionary mapping room number to (x, y) position
-
-for room in range(total_rooms - 1):  # Not in boss room
-    if random.random() < 0.8:  # 80% chance for star
-        rooms_with_stars.add(room)
-        # Generate random position for star
-        star_x = random.uniform(-200, 200)
-        star_y = random.uniform(-200, 200)
-        room_star_positions[room] = (star_x, star_y)
-    
-    if random.random() < 0.55:  # 55% chance for hat
-        rooms_with_hats.add(room)
-        # Generate random position for hat
-        hat_x = random.uniform(-200, 200)
-        hat_y = random.uniform(-200, 200)
-        room_hat_positions[room] = (hat_x, hat_y)
-
-# Generate coins for each room (8-12 coins per room, very common)
-for room in range(total_rooms - 1):  # Not in boss room
-    num_coins = random.randint(8, 12)
-    coin_positions = []
-    for _ in range(num_coins):
-        # Random positions spread throughout the room
-        coin_x = random.uniform(-220, 220)
-        coin_y = random.uniform(-220, 220)
-        coin_positions.append((coin_x, coin_y))
-    room_coins[room] = coin_positions
-
-# Generate Bensons for each room (progressively increasing from 5 to 20)
-for room in range(1, total_rooms - 1):  # Start from room 1, not in boss room or first room
-    # Room 1 (index 1): 5 Bensons
-    # Progressively increase to 20 by room 13 (index 13)
-    if room == 1:
-        num_bensons = 5
-    else:
-        # Linear scaling from 5 to 20 over rooms 2-13
-        # room 2: ~6, room 3: ~8, ..., room 13: 20
-        num_bensons = min(20, 5 + int((room - 1) * 1.25))
-    
-    benson_list = []
-    for _ in range(num_bensons):
-        # Random positions spread throughout the room
-        benson_x = random.uniform(-220, 220)
-        benson_y = random.uniform(-220, 220)
-        benson_list.append([benson_x, benson_y, True, 0])  # x, y, active, hit_cooldown
-    room_bensons[room] = benson_list
-
-# Track collected items
-collected_stars = set()
-collected_hats = set()
-
-
-def initialize_level(level):
-    """Initialize game data for a specific level"""
-    global total_rooms, current_room, room_bensons, room_coins, room_star_positions, room_hat_positions
-    global collected_stars, collected_hats, collected_coins, benson_hit_by_lasso
-    global woody_x, woody_y, woody_z, woody_angle, woody_health, woody_lives
-    global boss_room_entered, gabby_visible, bo_peep_visible, gabby_hit
-    global win_sequence_stage, show_level_text, level_text_timer, current_level
-    global rooms_with_stars, rooms_with_hats
-    
-    current_level = level
-    config = level_configs[level]
-    total_rooms = config['total_rooms']
-    current_room = 0
-    
-    # Reset Woody position to center, behind furniture
-    woody_x = 0
-    woody_y = 100  # Slightly back from center
-    woody_z = 0
-    woody_angle = 270
-    woody_health = 100
-    # Lives carry over between levels
-    
-    # Show level text
-    show_level_text = True
-    level_text_timer = 0
-    
-    # Reset boss room state
-    boss_room_entered = False
-    gabby_visible = False
-    bo_peep_visible = False
-    gabby_hit = False
-    win_sequence_stage = 0
-    
-    # Clear collected items
-    collected_stars = set()
-    collected_hats = set()
-    collected_coins = set()
-    benson_hit_by_lasso = set()
-    
-    # Regenerate level-specific content
-    room_coins = {}
-    room_star_positions = {}
-    room_hat_positions = {}
-    room_bensons = {}
-    rooms_with_stars = set()
-    rooms_with_hats = set()
-    
-    random.seed(42 + level * 100)  # Different seed per level
-    
-    # Generate stars and hats
-    for room in range(total_rooms - 1):  # Not in boss room
-        if random.random() < 0.8:  # 80% chance for star
-            star_x = random.uniform(-200, 200)
-            star_y = random.uniform(-200, 200)
-            room_star_positions[room] = (star_x, star_y)
-            rooms_with_stars.add(room)
-        
-        if random.random() < 0.55:  # 55% chance for hat
-            hat_x = random.uniform(-200, 200)
-            hat_y = random.uniform(-200, 200)
-            room_hat_positions[room] = (hat_x, hat_y)
-            rooms_with_hats.add(room)
-    
-    # Generate coins
-    for room in range(total_rooms - 1):
-        num_coins = random.randint(8, 12)
-        coin_positions = []
-        for _ in range(num_coins):
-            coin_x = random.uniform(-220, 220)
-            coin_y = random.uniform(-220, 220)
-            coin_positions.append((coin_x, coin_y))
-        room_coins[room] = coin_positions
-    
-    # Generate enemies
-    enemy_min = config['enemy_min']
-    enemy_max = config['enemy_max']
-    
-    for room in range(1, total_rooms - 1):  # Start from room 1, not in boss room
-        if level == 1:
-            # Level 1: 5-10 enemies per room
-            num_enemies = random.randint(enemy_min, enemy_max)
-        else:
-            # Level 2/3: Progressive scaling
-            if room == 1:
-                num_enemies = enemy_min
-            else:
-                num_enemies = min(enemy_max, enemy_min + int((room - 1) * 1.25))
-        
-        enemy_list = []
-        for _ in range(num_enemies):
-            enemy_x = random.uniform(-220, 220)
-            # Don't spawn enemies too close to entry point (y > 150)
-            enemy_y = random.uniform(-220, 150)
-            enemy_list.append([enemy_x, enemy_y, True, 0])
-        room_bensons[room] = enemy_list
-
-
-# Track collected items
-collected_stars = set()
-collected_hats = set()
-
-# Animation timer for floating items
-item_animation_time = 0
-
-# Boss room state
-boss_room_entered = False
-gabby_visible = False
-bo_peep_visible = False
-gabby_hit = False
-bo_peep_approaching = False
-bo_peep_x = 0
-bo_peep_y = -200
-game_won = False
-
-# Gabby Gabby boss properties
-gabby_x = 0
-gabby_y = -150
-gabby_health = 50  # Takes 50 lasso hits to defeat
-gabby_move_speed = 0.15  # Slower movement
-gabby_move_timer = 0
-gabby_move_direction = 0  # Random movement direction
-
-# Gabby's attack system
-cup_projectiles = []  # List of active cups: [(x, y, dx, dy, lifetime), ...]
-gabby_cup_attack_timer = 0
-gabby_cup_attack_cooldown = 300  # 5 seconds at 60 FPS
-
-gabby_stick_attack_timer = 0
-gabby_stick_attack_cooldown = 240  # 4 seconds at 60 FPS
-gabby_proximity_timer = 0  # Time Woody has been close
-gabby_is_close = False
-gabby_attacking_with_stick = False
-stick_attack_duration = 20  # Frames for stick animation
-
-# Attack ranges
-gabby_close_range = 60  # Distance considered "close" for stick attack
-gabby_far_range = 80  # Distance to start throwing cups
-
-# Win sequence states
-win_sequence_stage = 0  # 0=normal, 1=camera_turning, 2=cage_fading, 3=bo_approaching, 4=hugging, 5=mission_complete, 6=game_end
-win_sequence_timer = 0
-cage_alpha = 1.0  # For fade out
-camera_target_angle = 0  # Camera rotation target
-show_mission_complete = False
-show_game_end = False
-
-# Woody properties
-woody_x = 0
-woody_y = 100  # Start slightly behind center to avoid central furniture
-woody_z = 0
-woody_angle = 270  # Face towards front door (270 = facing -Y direction)
-woody_jump_velocity = 0
-woody_is_jumping = False
-woody_on_ground = True
-
-# Health and lives
-woody_health = 100  # Health percentage (0-100)
-woody_lives = 3  # Number of lives
-
-# Health and lives
-woody_health = 100  # Health percentage (0-100)
-woody_lives = 3  # Number of lives
-
-# Health and lives
-woody_health = 100  # Health percentage (0-100)
-woody_lives = 3  # Number of lives
-
-# Lasso attack
-lasso_attacking = False
-lasso_attack_timer = 0
-lasso_attack_duration = 20  # frames
-lasso_damage_cooldown = 0  # Cooldown to prevent multiple hits per attack
+# Static room geometry cache (floor, walls, doors, furniture)
+# Dictionary mapping (room_pattern, back_door, front_door) to the shell display list and furniture tiles
+# (cleared whenever the level changes, since each level has its own palette)
+use_room_geometry_cache = True
+furniture_tile_size = 200  # Furniture is baked in 3 x 3 tiles so each tile can be culled
+room_geometry_cache = {}
+room_geometry_cache_level = None  # Level the cached geometry was compiled for (colors change per level)
 
 # Camera
 camera_distance = 100
 camera_height = 50
-
-# Movement
-move_speed = 0.5  # Reduced from 0.8
-rotation_speed = 0.3  # Reduced from 0.5
-gravity = 0.5
-jump_strength = 8
-
-# Furniture collision boxes for each room layout (x, y, width, height)
-# These represent rectangular collision areas for furniture
-furniture_obstacles = {
-    0: [],  # Will be populated based on room_pattern % 5
-}
+camera_fov = 45  # Perspective set up in init()
+camera_aspect = 1.25
+camera_near = 0.1
+camera_far = 2000
+
+# Fixed timestep - the simulation always advances in 60 Hz ticks, whatever the display rate
+SIMULATION_STEP = 1.0 / simulation.TICKS_PER_SECOND  # All timers and speeds are per tick
+MAX_CATCH_UP_STEPS = 5  # Ticks run per redisplay at most - a slow machine slows down instead of stalling
+INTERPOLATION_SNAP_DISTANCE = 50  # Bigger jumps (room changes, respawns) are drawn without blending
+simulation_accumulator = 0.0  # Real time not yet simulated
+last_idle_time = None
+render_alpha = 1.0  # Where rendering is between the previous tick (0) and the latest one (1)
+previous_tick_state = None  # Positions before the latest tick, for interpolation
+
+# Input recording (--record) - the latest game's ticks, written out when the program exits
+recording_path = None
+input_recorder = None
+
+# Autopilot demo (--autopilot) - the scripted player drives keys_pressed and restarts when the game ends
+autopilot = None
+autopilot_clock = None  # RoomClock of the level being played
+autopilot_games = 0  # Games started, also the seed of the next one
+autopilot_idle_ticks = 0  # Ticks since the game ended
+AUTOPILOT_RESTART_TICKS = 300  # 5 seconds on the game over / game end screen before starting again
+
+# View frustum culling - planes are recomputed every frame from the chase camera
+use_frustum_culling = True
+show_cull_stats = False  # Toggle with 'C'
+frustum_planes = []  # (a, b, c, d) per plane, inside when a*x + b*y + c*z + d >= 0
+cull_stats = {'drawn': 0, 'culled': 0}
+camera_eye = [0.0, 0.0, 0.0]  # Camera position of the current frame
+
+# Level of detail - tessellation tier picked per object from its camera distance
+use_lod = True
+lod_quality = 1.0  # Global knob: below 1.0 objects switch to coarser tiers closer to the camera
+lod_tier_distances = (150, 300)  # Camera distance where tier 1 and tier 2 start
+lod_tier_detail = (1.0, 0.5, 0.25)  # Fraction of the authored slices/stacks used by each tier
+lod_hysteresis = 0.1  # A boundary must be passed by 10% before switching tier (no popping)
+lod_tiers = {}  # Object key -> tier it was drawn with last frame
+
+# Instanced enemy rendering - filled by init_benson_instancing() when the context supports it
+use_enemy_instancing = True
+benson_instancing = {}  # program, buffers and attribute locations; empty = per-enemy fallback
+
+# Baked character models - filled by bake_character_models() at startup
+use_baked_models = True
+baked_models = {}  # Model name -> [(vertex buffer, vertex count) per LOD tier]
+
+# HUD text - GLUT bitmap fonts rasterized once into texture atlases
+glyph_atlases = {}  # font_key(font) -> texture, glyph texture coordinates and metrics
+text_batches = {}  # (font_key(font), x, y) -> (text, quad vertices, vertex count), rebuilt when the text changes
+
+# GLU quadric pool - draw functions borrow a quadric instead of allocating one per call
+QUADRIC_POOL_SIZE = 4
+quadric_pool = []  # Free quadrics ready for reuse
+quadrics_in_use = 0
+quadric_leaks_reported = 0  # Unreleased quadrics already warned about
+
+# Live GL/GLU object counts for the leak detector
+debug_gl_objects = False  # Print leak warnings while playing
+gl_object_counts = {'quadric': 0, 'display_list': 0, 'buffer': 0, 'program': 0, 'texture': 0}
+gl_object_history = []  # Total live objects at the end of each recent frame
+GL_OBJECT_HISTORY_FRAMES = 300  # 5 seconds at 60 FPS
+
+# GL call counters - the gl*/glu*/glut* functions this module calls, wrapped to count calls per
+# frame by entry point and by the draw function making them (overlay toggled with 'G')
+GL_STATE_CHANGE_PREFIXES = ('glEnable', 'glDisable', 'glBind', 'glColor', 'glMaterial', 'glLight', 'glBlendFunc',
+                            'glDepthMask', 'glLineWidth', 'glShadeModel', 'glUseProgram', 'glPushAttrib',
+                            'glPopAttrib', 'glTexEnv', 'glTexParameter')
+GL_COUNTER_HELPERS = frozenset(('draw_vertex_buffer', 'draw_baked_model', 'draw_headless_shape', 'draw_hud_text',
+                                 'draw_text', 'begin_hud', 'end_hud', 'create_vertex_buffer',
+                                 'delete_vertex_buffer'))  # Calls made here are charged to their caller
+GL_COUNTER_OVERLAY_ROWS = 16
+show_gl_counters = False
+gl_counter_path = None  # --gl-counters FILE, written when the program exits
+gl_counted_functions = {}  # Entry point name -> the real function, while counting is on
+gl_call_counts = {}  # (calling function, entry point) -> calls in the frame being drawn
+gl_frame_counts = {}  # The same for the last finished frame, shown by the overlay
+gl_total_counts = {}  # The same summed over every counted frame, exported
+gl_counted_frames = 0
+gl_counter_depth = 0  # Counted calls running - GL calls made inside one (headless GLUT shapes) are not counted
 
 # Input states
 keys_pressed = {
@@ -355,96 +130,849 @@ keys_pressed = {
 }
 
 
-def get_furniture_obstacles(room_pattern):
-    """Get furniture collision boxes for a room layout"""
-    obstacles = []
-    
-    if room_pattern == 0:  # Layout 1
-        # Showcases on back wall
-        for x_pos in [-200, -80, 80, 200]:
-            obstacles.append((x_pos, 250, 40, 40))
-        # Side tables
-        for y_pos in [-150, 0, 150]:
-            obstacles.append((-250, y_pos, 40, 40))
-            obstacles.append((250, y_pos, 40, 40))
-        # Central table with chairs
-        obstacles.append((0, 0, 50, 50))
-        for x, y in [(-40, -40), (40, -40), (-40, 40), (40, 40)]:
-            obstacles.append((x, y, 25, 25))
-    
-    elif room_pattern == 1:  # Layout 2
-        # Corner showcases
-        for x, y in [(-240, -240), (240, -240), (-240, 240), (240, 240)]:
-            obstacles.append((x, y, 40, 40))
-        # Tables in center
-        for x, y in [(-100, 100), (100, 100), (-100, -100), (100, -100)]:
-            obstacles.append((x, y, 50, 50))
-            obstacles.append((x - 30, y, 25, 25))
-    
-    elif room_pattern == 2:  # Layout 3
-        # Tables along walls
-        for y_pos in [-200, -80, 80, 200]:
-            obstacles.append((-240, y_pos, 40, 40))
-            obstacles.append((240, y_pos, 40, 40))
-        # Central pedestal
-        obstacles.append((0, 0, 60, 60))
-    
-    elif room_pattern == 3:  # Layout 4
-        # Side tables
-        for x_pos in [-200, 0, 200]:
-            obstacles.append((x_pos, -230, 40, 40))
-            obstacles.append((x_pos, 230, 40, 40))
-        # Center tables
-        for x, y in [(-100, 0), (100, 0)]:
-            obstacles.append((x, y, 50, 50))
-    
-    elif room_pattern == 4:  # Layout 5
-        # Diagonal showcases
-        for x, y in [(-180, -180), (180, -180), (-180, 180), (180, 180)]:
-            obstacles.append((x, y, 40, 40))
-        # Center arrangement
-        obstacles.append((0, 0, 50, 50))
-        for x, y in [(-60, 0), (60, 0), (0, -60), (0, 60)]:
-            obstacles.append((x, y, 30, 30))
-    
-    return obstacles
-
-
-def check_collision_with_furniture(x, y, radius, obstacles):
-    """Check if a circular entity collides with any rectangular obstacle"""
-    for ox, oy, width, height in obstacles:
-        # Find closest point on rectangle to circle center
-        closest_x = max(ox - width/2, min(x, ox + width/2))
-        closest_y = max(oy - height/2, min(y, oy + height/2))
-        
-        # Calculate distance
-        dx = x - closest_x
-        dy = y - closest_y
-        distance = math.sqrt(dx*dx + dy*dy)
-        
-        if distance < radius:
-            return True
-    return False
+def track_gl_objects(kind, delta):
+    """Count GL/GLU objects created (+) or freed (-) for the leak detector"""
+    gl_object_counts[kind] += delta
 
 
-def draw_text(text, x, y, font=GLUT_BITMAP_HELVETICA_18):
-    """Draw 2D text on screen"""
+def acquire_quadric():
+    """Borrow a quadric from the pool, creating one only when the pool is empty"""
+    global quadrics_in_use
+    if quadric_pool:
+        quad = quadric_pool.pop()
+    else:
+        quad = gluNewQuadric()
+        track_gl_objects('quadric', 1)
+    quadrics_in_use += 1
+    return quad
+
+
+def release_quadric(quad):
+    """Return a borrowed quadric to the pool (only freed if the pool is already full)"""
+    global quadrics_in_use
+    quadrics_in_use -= 1
+    if len(quadric_pool) < QUADRIC_POOL_SIZE:
+        quadric_pool.append(quad)
+    else:
+        gluDeleteQuadric(quad)
+        track_gl_objects('quadric', -1)
+
+
+def check_gl_object_leaks():
+    """Record live GL/GLU objects at the end of a frame and report suspected leaks"""
+    global quadric_leaks_reported
+    gl_object_history.append(sum(gl_object_counts.values()))
+    if len(gl_object_history) > GL_OBJECT_HISTORY_FRAMES:
+        del gl_object_history[0]
+    
+    if not debug_gl_objects:
+        return
+    
+    # Warn once per newly leaked quadric - the count itself stays accurate for the pool
+    if quadrics_in_use > quadric_leaks_reported:
+        print(f"GL leak: {quadrics_in_use - quadric_leaks_reported} quadric(s) not released, {quadrics_in_use} outstanding")
+    quadric_leaks_reported = quadrics_in_use
+    
+    # Caches level off after a few frames - a leak grows by at least one object every frame
+    growth = gl_object_history[-1] - gl_object_history[0]
+    if len(gl_object_history) == GL_OBJECT_HISTORY_FRAMES and growth >= GL_OBJECT_HISTORY_FRAMES - 1:
+        print(f"GL leak: {growth} objects created in {GL_OBJECT_HISTORY_FRAMES} frames, live {gl_object_counts}")
+        gl_object_history.clear()
+
+
+def draw_profiler_overlay():
+    """Draw min/avg/p99 per phase and a frame-time graph - must be called inside the HUD"""
+    if not simulation.profile_history:
+        return
+    
+    left, bottom, right, top = 10, 340, 330, 660
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_DEPTH_TEST)  # Panel, text and graph all sit at z = 0
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glColor4f(0, 0, 0, 0.6)
+    glBegin(GL_QUADS)
+    glVertex2f(left, bottom)
+    glVertex2f(right, bottom)
+    glVertex2f(right, top)
+    glVertex2f(left, top)
+    glEnd()
+    glDisable(GL_BLEND)
+    
+    # One row per phase, simulation first
+    y = top - 18
+    glColor3f(1, 1, 0)
+    for column, label in ((left + 8, "PHASE (ms)"), (left + 140, "MIN"), (left + 200, "AVG"), (left + 260, "P99")):
+        draw_hud_text(label, column, y, GLUT_BITMAP_HELVETICA_12)
+    for phase in simulation.PROFILE_SIMULATION_PHASES + simulation.PROFILE_RENDER_PHASES + ('frame',):
+        history = sorted(simulation.profile_history.get(phase, [0.0]))
+        y -= 15
+        if phase == 'frame':
+            glColor3f(1, 1, 0)
+        elif phase in simulation.PROFILE_SIMULATION_PHASES:
+            glColor3f(0.6, 0.9, 1)
+        else:
+            glColor3f(1, 1, 1)
+        draw_hud_text(phase.upper(), left + 8, y, GLUT_BITMAP_HELVETICA_12)
+        p99 = history[max(0, math.ceil(0.99 * len(history)) - 1)]
+        for column, value in ((left + 140, history[0]), (left + 200, sum(history) / len(history)), (left + 260, p99)):
+            draw_hud_text(f"{value:.2f}", column, y, GLUT_BITMAP_HELVETICA_12)
+    
+    # Frame-time graph, one bar per frame, with the 60 FPS budget line
+    graph_bottom = bottom + 10
+    graph_height = 60
+    pixels_per_ms = graph_height / 33.3
+    glColor3f(0.3, 0.9, 0.3)
+    glBegin(GL_LINES)
+    for index, frame_ms in enumerate(simulation.profile_history.get('frame', [])):
+        x = left + 10 + index * 2.5
+        glVertex2f(x, graph_bottom)
+        glVertex2f(x, graph_bottom + min(graph_height, frame_ms * pixels_per_ms))
+    glColor3f(1, 0.2, 0.2)
+    budget_y = graph_bottom + 1000.0 / 60 * pixels_per_ms
+    glVertex2f(left + 10, budget_y)
+    glVertex2f(right - 10, budget_y)
+    glEnd()
+    glPopAttrib()
+
+
+def gl_caller_name(frame):
+    """The nearest draw_* function up the stack that is not a helper, else the nearest non-helper caller"""
+    fallback = None
+    while frame is not None:
+        name = frame.f_code.co_name
+        if name not in GL_COUNTER_HELPERS and not name.startswith('headless_'):
+            if name.startswith('draw_'):
+                return name
+            if fallback is None:
+                fallback = name
+        frame = frame.f_back
+    return fallback
+
+
+def count_gl_calls(name, function):
+    """Wrap a GL entry point so every call is counted against the draw function making it"""
+    def counted(*args, **kwargs):
+        global gl_counter_depth
+        if gl_counter_depth == 0:
+            key = (gl_caller_name(sys._getframe(1)), name)
+            gl_call_counts[key] = gl_call_counts.get(key, 0) + 1
+        gl_counter_depth += 1
+        try:
+            return function(*args, **kwargs)
+        finally:
+            gl_counter_depth -= 1
+    return counted
+
+
+def start_gl_counters():
+    """Swap every GL, GLU and GLUT function in this module's globals for a counting wrapper"""
+    global gl_counted_frames
+    if gl_counted_functions:
+        return
+    module_globals = globals()
+    for name, value in list(module_globals.items()):
+        # Entry points the context lacks are falsy - leave them so bool(glGenBuffers) checks still work
+        if callable(value) and value and re.fullmatch(r'(gl|glu|glut)[A-Z]\w*', name):
+            gl_counted_functions[name] = value
+            module_globals[name] = count_gl_calls(name, value)
+    gl_call_counts.clear()
+    gl_frame_counts.clear()
+    gl_total_counts.clear()
+    gl_counted_frames = 0
+
+
+def stop_gl_counters():
+    """Put the real GL functions back"""
+    globals().update(gl_counted_functions)
+    gl_counted_functions.clear()
+
+
+def end_gl_counter_frame():
+    """Close the frame being counted - called as the next one starts"""
+    global gl_frame_counts, gl_call_counts, gl_counted_frames
+    if not gl_call_counts:
+        return
+    for key, calls in gl_call_counts.items():
+        gl_total_counts[key] = gl_total_counts.get(key, 0) + calls
+    gl_frame_counts, gl_call_counts = gl_call_counts, {}
+    gl_counted_frames += 1
+
+
+def summarize_gl_counts(counts, frames=1):
+    """Calls and state changes per frame, in total, by calling function and by entry point (busiest first)"""
+    functions = {}
+    entry_points = {}
+    for (caller, name), calls in counts.items():
+        row = functions.setdefault(caller, {'function': caller, 'calls': 0, 'state_changes': 0, 'entry_points': {}})
+        row['calls'] += calls
+        if name.startswith(GL_STATE_CHANGE_PREFIXES):
+            row['state_changes'] += calls
+        row['entry_points'][name] = row['entry_points'].get(name, 0) + calls
+        entry_points[name] = entry_points.get(name, 0) + calls
+    
+    frames = max(1, frames)
+    for row in functions.values():
+        row['calls'] = round(row['calls'] / frames, 2)
+        row['state_changes'] = round(row['state_changes'] / frames, 2)
+        row['entry_points'] = {name: round(calls / frames, 2)
+                               for name, calls in sorted(row['entry_points'].items(), key=lambda item: -item[1])}
+    return {
+        'frames': frames,
+        'calls_per_frame': round(sum(row['calls'] for row in functions.values()), 2),
+        'state_changes_per_frame': round(sum(row['state_changes'] for row in functions.values()), 2),
+        'functions': sorted(functions.values(), key=lambda row: -row['calls']),
+        'entry_points': {name: round(calls / frames, 2)
+                         for name, calls in sorted(entry_points.items(), key=lambda item: -item[1])},
+    }
+
+
+def write_gl_counters(path):
+    """Export the per-frame averages over every counted frame, and the last frame, as JSON"""
+    end_gl_counter_frame()
+    report = {
+        'average': summarize_gl_counts(gl_total_counts, gl_counted_frames),
+        'last_frame': summarize_gl_counts(gl_frame_counts),
+    }
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Wrote GL call counts of {gl_counted_frames} frames to {path}")
+
+
+def print_gl_counters(summary, rows=GL_COUNTER_OVERLAY_ROWS):
+    """Print the busiest draw functions of a summarize_gl_counts() summary"""
+    print(f"  GL calls {summary['calls_per_frame']:.0f}/frame, state changes {summary['state_changes_per_frame']:.0f}/frame "
+          f"(averaged over {summary['frames']} frames)")
+    print(f"  {'function':<32} {'calls':>9} {'state':>7}  top entry points")
+    for row in summary['functions'][:rows]:
+        top = ", ".join(f"{name} {calls:g}" for name, calls in list(row['entry_points'].items())[:3])
+        print(f"  {row['function']:<32} {row['calls']:>9g} {row['state_changes']:>7g}  {top}")
+
+
+def draw_gl_counter_overlay():
+    """Draw the last frame's GL calls by draw function - must be called inside the HUD"""
+    summary = summarize_gl_counts(gl_frame_counts)
+    left, bottom, right, top = 640, 340, 990, 660
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_DEPTH_TEST)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glColor4f(0, 0, 0, 0.6)
+    glBegin(GL_QUADS)
+    glVertex2f(left, bottom)
+    glVertex2f(right, bottom)
+    glVertex2f(right, top)
+    glVertex2f(left, top)
+    glEnd()
+    glDisable(GL_BLEND)
+    
+    y = top - 18
+    glColor3f(1, 1, 0)
+    draw_hud_text(f"GL CALLS {summary['calls_per_frame']:.0f}  STATE CHANGES {summary['state_changes_per_frame']:.0f}",
+                  left + 8, y, GLUT_BITMAP_HELVETICA_12)
+    y -= 15
+    for column, label in ((left + 8, "FUNCTION"), (left + 230, "CALLS"), (left + 290, "STATE")):
+        draw_hud_text(label, column, y, GLUT_BITMAP_HELVETICA_12)
+    glColor3f(1, 1, 1)
+    for row in summary['functions'][:GL_COUNTER_OVERLAY_ROWS]:
+        y -= 15
+        draw_hud_text(row['function'][:30], left + 8, y, GLUT_BITMAP_HELVETICA_12)
+        draw_hud_text(f"{row['calls']:.0f}", left + 230, y, GLUT_BITMAP_HELVETICA_12)
+        draw_hud_text(f"{row['state_changes']:.0f}", left + 290, y, GLUT_BITMAP_HELVETICA_12)
+    glPopAttrib()
+
+
+def font_key(font):
+    """Hashable key for a GLUT font handle (PyOpenGL fonts are ctypes pointers)"""
+    return getattr(font, 'value', font)
+
+
+def build_glyph_atlas(font):
+    """Rasterize the printable characters of a GLUT bitmap font into an alpha texture"""
+    pad = 2  # Room for glyphs that reach outside their advance width
+    cell_height = glutBitmapHeight(font) + 2 * pad
+    descent = cell_height // 3  # Baseline offset inside a cell (leaves room for descenders)
+    characters = [chr(code) for code in range(32, 127)]
+    widths = {ch: glutBitmapWidth(font, ord(ch)) for ch in characters}
+    cell_width = max(widths.values()) + 2 * pad
+    columns = 16
+    rows = (len(characters) + columns - 1) // columns
+    atlas_width = columns * cell_width
+    atlas_height = rows * cell_height
+    
+    # Render into an offscreen framebuffer when available, otherwise the back buffer
+    framebuffer = 0
+    if bool(glGenFramebuffers):
+        framebuffer = glGenFramebuffers(1)
+        renderbuffer = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, renderbuffer)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, atlas_width, atlas_height)
+        glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, renderbuffer)
+    
+    viewport = glGetIntegerv(GL_VIEWPORT)
+    glViewport(0, 0, atlas_width, atlas_height)
+    glClear(GL_COLOR_BUFFER_BIT)
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
+    gluOrtho2D(0, atlas_width, 0, atlas_height)
     glMatrixMode(GL_MODELVIEW)
     glPushMatrix()
     glLoadIdentity()
-    glRasterPos2f(x, y)
-    for ch in text:
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_DEPTH_TEST)
+    glColor3f(1, 1, 1)
+    
+    glyphs = {}
+    for index, ch in enumerate(characters):
+        cell_x = (index % columns) * cell_width
+        cell_y = (index // columns) * cell_height
+        glRasterPos2f(cell_x + pad, cell_y + descent)
         glutBitmapCharacter(font, ord(ch))
+        # Texture coordinates of the cell and the pen advance
+        glyphs[ch] = (cell_x / atlas_width, cell_y / atlas_height,
+                      (cell_x + cell_width) / atlas_width, (cell_y + cell_height) / atlas_height,
+                      widths[ch])
+    
+    glPixelStorei(GL_PACK_ALIGNMENT, 1)
+    pixels = glReadPixels(0, 0, atlas_width, atlas_height, GL_RED, GL_UNSIGNED_BYTE)
+    
+    glPopAttrib()
+    glPopMatrix()
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glViewport(*viewport)
+    glClear(GL_COLOR_BUFFER_BIT)
+    if framebuffer:
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glDeleteFramebuffers(1, [framebuffer])
+        glDeleteRenderbuffers(1, [renderbuffer])
+    
+    texture = glGenTextures(1)
+    track_gl_objects('texture', 1)
+    glBindTexture(GL_TEXTURE_2D, texture)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA8, atlas_width, atlas_height, 0, GL_ALPHA, GL_UNSIGNED_BYTE, pixels)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    
+    glyph_atlases[font_key(font)] = {
+        'texture': texture,
+        'glyphs': glyphs,
+        'cell_width': cell_width,
+        'cell_height': cell_height,
+        'descent': descent,
+        'pad': pad,
+    }
+
+
+def init_text_rendering():
+    """Build glyph atlases for every font used by the HUD and menus"""
+    if not bool(glGenTextures):
+        return
+    for font in (GLUT_BITMAP_HELVETICA_12, GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_TIMES_ROMAN_24):
+        build_glyph_atlas(font)
+
+
+def build_text_batch(text, x, y, atlas):
+    """Build the textured quads (x, y, u, v per vertex) for a string"""
+    glyphs = atlas['glyphs']
+    pad = atlas['pad']
+    bottom = y - atlas['descent']
+    top = bottom + atlas['cell_height']
+    vertices = []
+    pen_x = x
+    for ch in text:
+        glyph = glyphs.get(ch, glyphs['?'])
+        u0, v0, u1, v1, advance = glyph
+        left = pen_x - pad
+        right = left + atlas['cell_width']
+        vertices.extend((left, bottom, u0, v0,
+                         right, bottom, u1, v0,
+                         right, top, u1, v1,
+                         left, top, u0, v1))
+        pen_x += advance
+    return float_array(vertices), len(vertices) // 4
+
+
+def begin_hud():
+    """Switch to the 1000x800 orthographic projection used by all 2D overlays"""
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, 1000, 0, 800)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+
+
+def end_hud():
+    """Restore the 3D projection after begin_hud()"""
     glPopMatrix()
     glMatrixMode(GL_PROJECTION)
     glPopMatrix()
     glMatrixMode(GL_MODELVIEW)
 
 
+def draw_hud_text(text, x, y, font=GLUT_BITMAP_HELVETICA_18):
+    """Draw text in the current color - must be called between begin_hud() and end_hud()"""
+    atlas = glyph_atlases.get(font_key(font))
+    if atlas is None:
+        # No atlas - fall back to GLUT bitmap characters
+        glRasterPos2f(x, y)
+        for ch in text:
+            glutBitmapCharacter(font, ord(ch))
+        return
+    
+    # Reuse the batch for this screen position until the string changes
+    key = (font_key(font), x, y)
+    batch = text_batches.get(key)
+    if batch is None or batch[0] != text:
+        batch = (text,) + build_text_batch(text, x, y, atlas)
+        text_batches[key] = batch
+    _, vertices, vertex_count = batch
+    
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_DEPTH_TEST)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glEnable(GL_TEXTURE_2D)
+    glBindTexture(GL_TEXTURE_2D, atlas['texture'])
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+    address = ctypes.addressof(vertices)
+    glVertexPointer(2, GL_FLOAT, 16, ctypes.c_void_p(address))
+    glTexCoordPointer(2, GL_FLOAT, 16, ctypes.c_void_p(address + 8))
+    glDrawArrays(GL_QUADS, 0, vertex_count)
+    glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    glPopAttrib()
+
+
+def draw_text(text, x, y, font=GLUT_BITMAP_HELVETICA_18):
+    """Draw 2D text on screen"""
+    begin_hud()
+    draw_hud_text(text, x, y, font)
+    end_hud()
+
+
+# Model baking - a draw function is replayed once against a software matrix stack
+# and its primitives are collected as a flat triangle list (x, y, z, r, g, b per vertex)
+IDENTITY_MATRIX = [1.0, 0.0, 0.0, 0.0,
+                   0.0, 1.0, 0.0, 0.0,
+                   0.0, 0.0, 1.0, 0.0,
+                   0.0, 0.0, 0.0, 1.0]
+capture_matrix_stack = [IDENTITY_MATRIX]
+capture_current_color = (1.0, 1.0, 1.0)
+capture_vertices = []
+capture_lod_tier = 0  # Tessellation tier applied to spheres, tori, cylinders and disks while baking
+
+
+def matrix_multiply(a, b):
+    """Multiply two 4x4 row-major matrices stored as flat lists"""
+    return [a[row * 4] * b[col] + a[row * 4 + 1] * b[4 + col] +
+            a[row * 4 + 2] * b[8 + col] + a[row * 4 + 3] * b[12 + col]
+            for row in range(4) for col in range(4)]
+
+
+def capture_push_matrix():
+    """glPushMatrix replacement while baking"""
+    capture_matrix_stack.append(capture_matrix_stack[-1])
+
+
+def capture_pop_matrix():
+    """glPopMatrix replacement while baking"""
+    capture_matrix_stack.pop()
+
+
+def capture_translate(x, y, z):
+    """glTranslatef replacement while baking"""
+    capture_matrix_stack[-1] = matrix_multiply(capture_matrix_stack[-1],
+                                               [1, 0, 0, x, 0, 1, 0, y, 0, 0, 1, z, 0, 0, 0, 1])
+
+
+def capture_rotate(angle, x, y, z):
+    """glRotatef replacement while baking (angle in degrees around axis x, y, z)"""
+    length = math.sqrt(x*x + y*y + z*z)
+    x, y, z = x / length, y / length, z / length
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    t = 1 - c
+    rotation = [t*x*x + c, t*x*y - s*z, t*x*z + s*y, 0,
+                t*x*y + s*z, t*y*y + c, t*y*z - s*x, 0,
+                t*x*z - s*y, t*y*z + s*x, t*z*z + c, 0,
+                0, 0, 0, 1]
+    capture_matrix_stack[-1] = matrix_multiply(capture_matrix_stack[-1], rotation)
+
+
+def capture_scale(x, y, z):
+    """glScalef replacement while baking"""
+    capture_matrix_stack[-1] = matrix_multiply(capture_matrix_stack[-1],
+                                               [x, 0, 0, 0, 0, y, 0, 0, 0, 0, z, 0, 0, 0, 0, 1])
+
+
+def capture_color(r, g, b, a=1.0):
+    """glColor3f / glColor4f replacement while baking (alpha is applied when drawing)"""
+    global capture_current_color
+    capture_current_color = (r, g, b)
+
+
+def capture_triangles(triangles):
+    """Transform local-space triangle vertices by the current matrix and store them"""
+    m = capture_matrix_stack[-1]
+    r, g, b = capture_current_color
+    for x, y, z in triangles:
+        capture_vertices.extend((m[0]*x + m[1]*y + m[2]*z + m[3],
+                                 m[4]*x + m[5]*y + m[6]*z + m[7],
+                                 m[8]*x + m[9]*y + m[10]*z + m[11],
+                                 r, g, b))
+
+
+def quads_to_triangles(quads):
+    """Split quads (4 vertices each) into triangle vertices"""
+    triangles = []
+    for a, b, c, d in quads:
+        triangles.extend((a, b, c, a, c, d))
+    return triangles
+
+
+def cube_triangles(size):
+    """Triangles of a glutSolidCube centered at the origin"""
+    h = size / 2.0
+    quads = [
+        ((-h, -h, h), (h, -h, h), (h, h, h), (-h, h, h)),      # Top
+        ((-h, -h, -h), (-h, h, -h), (h, h, -h), (h, -h, -h)),  # Bottom
+        ((h, -h, -h), (h, h, -h), (h, h, h), (h, -h, h)),      # Right
+        ((-h, -h, -h), (-h, -h, h), (-h, h, h), (-h, h, -h)),  # Left
+        ((-h, h, -h), (-h, h, h), (h, h, h), (h, h, -h)),      # Back
+        ((-h, -h, -h), (h, -h, -h), (h, -h, h), (-h, -h, h)),  # Front
+    ]
+    return quads_to_triangles(quads)
+
+
+def sphere_triangles(radius, slices, stacks):
+    """Triangles of a glutSolidSphere (slices around Z, stacks along Z)"""
+    def point(stack, slice_index):
+        phi = math.pi * stack / stacks
+        theta = 2 * math.pi * slice_index / slices
+        return (radius * math.sin(phi) * math.cos(theta),
+                radius * math.sin(phi) * math.sin(theta),
+                radius * math.cos(phi))
+    
+    quads = []
+    for i in range(stacks):
+        for j in range(slices):
+            quads.append((point(i, j), point(i + 1, j), point(i + 1, j + 1), point(i, j + 1)))
+    return quads_to_triangles(quads)
+
+
+def torus_triangles(inner_radius, outer_radius, sides, rings):
+    """Triangles of a glutSolidTorus lying in the XY plane"""
+    def point(ring, side):
+        theta = 2 * math.pi * ring / rings
+        phi = 2 * math.pi * side / sides
+        distance = outer_radius + inner_radius * math.cos(phi)
+        return (distance * math.cos(theta), distance * math.sin(theta), inner_radius * math.sin(phi))
+    
+    quads = []
+    for i in range(rings):
+        for j in range(sides):
+            quads.append((point(i, j), point(i + 1, j), point(i + 1, j + 1), point(i, j + 1)))
+    return quads_to_triangles(quads)
+
+
+def cylinder_triangles(base_radius, top_radius, height, slices, stacks):
+    """Triangles of a gluCylinder along +Z (no caps)"""
+    def point(stack, slice_index):
+        radius = base_radius + (top_radius - base_radius) * stack / stacks
+        theta = 2 * math.pi * slice_index / slices
+        return (radius * math.sin(theta), radius * math.cos(theta), height * stack / stacks)
+    
+    quads = []
+    for i in range(stacks):
+        for j in range(slices):
+            quads.append((point(i, j), point(i, j + 1), point(i + 1, j + 1), point(i + 1, j)))
+    return quads_to_triangles(quads)
+
+
+def disk_triangles(inner_radius, outer_radius, slices, loops):
+    """Triangles of a gluDisk in the Z = 0 plane"""
+    def point(loop, slice_index):
+        radius = inner_radius + (outer_radius - inner_radius) * loop / loops
+        theta = 2 * math.pi * slice_index / slices
+        return (radius * math.sin(theta), radius * math.cos(theta), 0.0)
+    
+    quads = []
+    for i in range(loops):
+        for j in range(slices):
+            quads.append((point(i, j), point(i + 1, j), point(i + 1, j + 1), point(i, j + 1)))
+    return quads_to_triangles(quads)
+
+
+def capture_solid_cube(size):
+    """glutSolidCube replacement while baking"""
+    capture_triangles(cube_triangles(size))
+
+
+def capture_solid_sphere(radius, slices, stacks):
+    """glutSolidSphere replacement while baking"""
+    capture_triangles(sphere_triangles(radius, lod_detail(slices, capture_lod_tier, 4),
+                                       lod_detail(stacks, capture_lod_tier, 3)))
+
+
+def capture_solid_torus(inner_radius, outer_radius, sides, rings):
+    """glutSolidTorus replacement while baking"""
+    capture_triangles(torus_triangles(inner_radius, outer_radius, lod_detail(sides, capture_lod_tier, 3),
+                                      lod_detail(rings, capture_lod_tier, 6)))
+
+
+def capture_cylinder(quad, base_radius, top_radius, height, slices, stacks):
+    """gluCylinder replacement while baking"""
+    capture_triangles(cylinder_triangles(base_radius, top_radius, height,
+                                         lod_detail(slices, capture_lod_tier, 4), stacks))
+
+
+def capture_disk(quad, inner_radius, outer_radius, slices, loops):
+    """gluDisk replacement while baking"""
+    capture_triangles(disk_triangles(inner_radius, outer_radius, lod_detail(slices, capture_lod_tier, 4), loops))
+
+
+def capture_new_quadric():
+    """acquire_quadric replacement while baking - no GLU object is needed"""
+    return None
+
+
+def capture_delete_quadric(quad):
+    """release_quadric replacement while baking"""
+    pass
+
+
+def bake_draw_function(draw_function, *args, tier=0):
+    """Replay a draw function against the software matrix stack and return its vertices"""
+    global capture_vertices, capture_current_color, capture_lod_tier
+    replacements = {
+        'glPushMatrix': capture_push_matrix,
+        'glPopMatrix': capture_pop_matrix,
+        'glTranslatef': capture_translate,
+        'glRotatef': capture_rotate,
+        'glScalef': capture_scale,
+        'glColor3f': capture_color,
+        'glColor4f': capture_color,
+        'glutSolidCube': capture_solid_cube,
+        'glutSolidSphere': capture_solid_sphere,
+        'glutSolidTorus': capture_solid_torus,
+        'gluCylinder': capture_cylinder,
+        'gluDisk': capture_disk,
+        'acquire_quadric': capture_new_quadric,
+        'release_quadric': capture_delete_quadric,
+    }
+    module_globals = globals()
+    originals = {name: module_globals[name] for name in replacements}
+    capture_matrix_stack[:] = [IDENTITY_MATRIX]
+    capture_current_color = (1.0, 1.0, 1.0)
+    capture_vertices = []
+    capture_lod_tier = tier
+    module_globals.update(replacements)
+    try:
+        draw_function(*args)
+    finally:
+        module_globals.update(originals)
+    return capture_vertices
+
+
+def float_array(values):
+    """Pack a list of numbers into a C float array for buffer uploads"""
+    return (GLfloat * len(values))(*values)
+
+
+def compile_shader_program(vertex_source, fragment_source, attribute_locations):
+    """Compile and link a GLSL program, raising RuntimeError with the driver log on failure"""
+    program = glCreateProgram()
+    track_gl_objects('program', 1)
+    for shader_type, source in ((GL_VERTEX_SHADER, vertex_source), (GL_FRAGMENT_SHADER, fragment_source)):
+        shader = glCreateShader(shader_type)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError(glGetShaderInfoLog(shader).decode(errors='replace'))
+        glAttachShader(program, shader)
+        glDeleteShader(shader)  # Freed together with the program
+    for name, location in attribute_locations.items():
+        glBindAttribLocation(program, location, name)
+    glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        raise RuntimeError(glGetProgramInfoLog(program).decode(errors='replace'))
+    return program
+
+
+def bake_character_models():
+    """Bake each composite character into one vertex/color buffer per LOD tier (its parts move as one)"""
+    if not bool(glGenBuffers):
+        return
+    
+    # Model name -> draw function and arguments that draw it at the origin
+    characters = {
+        'woody': (draw_woody_body, ()),  # Lasso is animated and stays live
+        'gabby_gabby': (draw_gabby_gabby, (0, 0)),
+        'lotso': (draw_lotso, (0, 0)),
+        'potato_head': (draw_potato_head, (0, 0)),
+        'bo_peep': (draw_bo_peep, (0, 0)),
+        'buzz_caged': (draw_buzz_caged, (0, 0)),
+        'jessie_caged': (draw_jessie_caged, (0, 0)),
+        'jessie': (draw_jessie, (0, 0, 0)),
+        'buzz': (draw_buzz, (0, 0, 0)),
+    }
+    for name, (draw_function, args) in characters.items():
+        baked_models.pop(name, None)  # Bake from the live draw code
+        tiers = []
+        for tier in range(len(lod_tier_detail)):
+            vertices = bake_draw_function(draw_function, *args, tier=tier)
+            tiers.append((create_vertex_buffer(vertices), len(vertices) // 6))
+        baked_models[name] = tiers
+
+
+def create_vertex_buffer(vertices):
+    """Upload baked vertices (x, y, z, r, g, b) into a static vertex buffer"""
+    vertex_buffer = glGenBuffers(1)
+    track_gl_objects('buffer', 1)
+    glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+    glBufferData(GL_ARRAY_BUFFER, float_array(vertices), GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    return vertex_buffer
+
+
+def delete_vertex_buffer(vertex_buffer):
+    """Free a buffer created by create_vertex_buffer()"""
+    glDeleteBuffers(1, [vertex_buffer])
+    track_gl_objects('buffer', -1)
+
+
+def draw_vertex_buffer(vertex_buffer, vertex_count):
+    """Draw baked triangles with their per-vertex colors in one call"""
+    glBindBuffer(GL_ARRAY_BUFFER, vertex_buffer)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 24, ctypes.c_void_p(0))
+    glEnableClientState(GL_COLOR_ARRAY)
+    glColorPointer(3, GL_FLOAT, 24, ctypes.c_void_p(12))
+    glDrawArrays(GL_TRIANGLES, 0, vertex_count)
+    glDisableClientState(GL_COLOR_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+def draw_baked_model(name, x, y, z, tier=None):
+    """Draw a baked character at (x, y, z); returns False if it must be drawn live"""
+    if not use_baked_models or name not in baked_models:
+        return False
+    
+    if tier is None:
+        tier = lod_tier(('model', name), x, y, z + 15)
+    vertex_buffer, vertex_count = baked_models[name][tier]
+    glPushMatrix()
+    glTranslatef(x, y, z)
+    draw_vertex_buffer(vertex_buffer, vertex_count)
+    glPopMatrix()
+    return True
+
+
+def set_view_frustum(eye, target):
+    """Compute culling planes for the camera (same matrices as gluPerspective + gluLookAt)"""
+    cull_stats['drawn'] = 0
+    cull_stats['culled'] = 0
+    camera_eye[:] = eye  # Also used for level of detail
+    
+    # View matrix (gluLookAt with Z up)
+    fx, fy, fz = target[0] - eye[0], target[1] - eye[1], target[2] - eye[2]
+    length = math.sqrt(fx*fx + fy*fy + fz*fz)
+    side_length = math.sqrt(fx*fx + fy*fy)
+    if length == 0 or side_length == 0:
+        frustum_planes.clear()  # Degenerate view - draw everything
+        return
+    fx, fy, fz = fx / length, fy / length, fz / length
+    sx, sy, sz = fy / side_length * length, -fx / side_length * length, 0.0  # forward x up
+    ux, uy, uz = sy*fz - sz*fy, sz*fx - sx*fz, sx*fy - sy*fx  # side x forward
+    view = [sx, sy, sz, -(sx*eye[0] + sy*eye[1] + sz*eye[2]),
+            ux, uy, uz, -(ux*eye[0] + uy*eye[1] + uz*eye[2]),
+            -fx, -fy, -fz, fx*eye[0] + fy*eye[1] + fz*eye[2],
+            0, 0, 0, 1]
+    
+    # Projection matrix (gluPerspective)
+    f = 1 / math.tan(math.radians(camera_fov) / 2)
+    depth = camera_near - camera_far
+    projection = [f / camera_aspect, 0, 0, 0,
+                  0, f, 0, 0,
+                  0, 0, (camera_far + camera_near) / depth, 2 * camera_far * camera_near / depth,
+                  0, 0, -1, 0]
+    
+    # Planes from the combined matrix: left, right, bottom, top, near, far
+    clip = matrix_multiply(projection, view)
+    planes = []
+    for row in range(3):
+        for sign in (1, -1):
+            a, b, c, d = (clip[12 + i] + sign * clip[row * 4 + i] for i in range(4))
+            norm = math.sqrt(a*a + b*b + c*c)
+            planes.append((a / norm, b / norm, c / norm, d / norm))
+    frustum_planes[:] = planes
+
+
+def sphere_in_frustum(x, y, z, radius):
+    """Check a bounding sphere against the view frustum and count the result"""
+    if use_frustum_culling:
+        for a, b, c, d in frustum_planes:
+            if a*x + b*y + c*z + d < -radius:
+                cull_stats['culled'] += 1
+                return False
+    cull_stats['drawn'] += 1
+    return True
+
+
+def box_in_frustum(min_x, min_y, min_z, max_x, max_y, max_z):
+    """Check an axis-aligned bounding box against the view frustum and count the result"""
+    if use_frustum_culling:
+        for a, b, c, d in frustum_planes:
+            # Corner of the box furthest along the plane normal
+            x = max_x if a > 0 else min_x
+            y = max_y if b > 0 else min_y
+            z = max_z if c > 0 else min_z
+            if a*x + b*y + c*z + d < 0:
+                cull_stats['culled'] += 1
+                return False
+    cull_stats['drawn'] += 1
+    return True
+
+
+def lod_tier(key, x, y, z):
+    """Pick the tessellation tier of an object from its camera distance, with hysteresis"""
+    if not use_lod:
+        return 0
+    
+    dx = x - camera_eye[0]
+    dy = y - camera_eye[1]
+    dz = z - camera_eye[2]
+    distance = math.sqrt(dx*dx + dy*dy + dz*dz) / lod_quality
+    
+    tier = lod_tiers.get(key)
+    if tier is None:
+        tier = sum(1 for boundary in lod_tier_distances if distance > boundary)
+    else:
+        # Only switch once the boundary has been passed by the hysteresis margin
+        while tier < len(lod_tier_distances) and distance > lod_tier_distances[tier] * (1 + lod_hysteresis):
+            tier += 1
+        while tier > 0 and distance < lod_tier_distances[tier - 1] * (1 - lod_hysteresis):
+            tier -= 1
+    lod_tiers[key] = tier
+    return tier
+
+
+def lod_detail(count, tier, minimum):
+    """Slices/stacks/sides to use for an authored count at a tier"""
+    return max(minimum, int(count * lod_tier_detail[tier]))
+
+
 def draw_star(x, y, animation_offset):
     """Draw an animated floating star"""
     glPushMatrix()
@@ -570,7 +1098,7 @@ def draw_hat_collectible(x, y, animation_offset):
     glPopMatrix()
 
 
-def draw_coin(x, y, animation_offset):
+def draw_coin(x, y, animation_offset, tier=0):
     """Draw an animated floating coin"""
     glPushMatrix()
     
@@ -590,23 +1118,24 @@ def draw_coin(x, y, animation_offset):
     # Draw coin as a flat cylinder (torus looks like coin)
     glPushMatrix()
     glRotatef(90, 1, 0, 0)  # Rotate to make it horizontal
-    glutSolidTorus(0.3, 4, 8, 20)  # Inner radius, outer radius, sides, rings
+    glutSolidTorus(0.3, 4, lod_detail(8, tier, 3), lod_detail(20, tier, 6))  # Inner radius, outer radius, sides, rings
     glPopMatrix()
     
     # Add a center sphere for thickness
     glColor3f(0.9, 0.75, 0.0)  # Slightly darker center
-    glutSolidSphere(3, 12, 12)
+    glutSolidSphere(3, lod_detail(12, tier, 4), lod_detail(12, tier, 3))
     
     glPopMatrix()
 
 
-def draw_benson(x, y):
+def draw_benson(x, y, enemy_color=None, tier=0):
     """Draw a Benson enemy character"""
     glPushMatrix()
     glTranslatef(x, y, 0)
     
     # Get level-specific enemy color
-    enemy_color = level_configs[current_level]['enemy_color']
+    if enemy_color is None:
+        enemy_color = level_configs[game.current_level]['enemy_color']
     
     # Body (level-specific color)
     glColor3f(*enemy_color)
@@ -621,7 +1150,7 @@ def draw_benson(x, y):
     glColor3f(min(r + 0.1, 1.0), min(g + 0.1, 1.0), min(b + 0.1, 1.0))
     glPushMatrix()
     glTranslatef(0, 0, 14)
-    glutSolidSphere(3, 8, 8)
+    glutSolidSphere(3, lod_detail(8, tier, 4), lod_detail(8, tier, 3))
     glPopMatrix()
     
     # Arms
@@ -645,8 +1174,135 @@ def draw_benson(x, y):
     glPopMatrix()
 
 
+# Instanced enemy shaders - each vertex stores its color offset from the enemy color,
+# so min(c + 0.1, 1.0) / max(c - 0.05, 0.0) in draw_benson become one clamp
+BENSON_VERTEX_SHADER = """
+#version 120
+attribute vec3 vertex_position;
+attribute vec3 vertex_shade;
+attribute vec2 instance_position;
+attribute vec3 instance_color;
+varying vec3 color;
+void main() {
+    color = clamp(instance_color + vertex_shade, 0.0, 1.0);
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(vertex_position + vec3(instance_position, 0.0), 1.0);
+}
+"""
+
+BENSON_FRAGMENT_SHADER = """
+#version 120
+varying vec3 color;
+void main() {
+    gl_FragColor = vec4(color, 1.0);
+}
+"""
+
+
+def init_benson_instancing():
+    """Set up the instanced enemy draw path if the GL context supports it"""
+    if not (bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor) and bool(glCreateShader)):
+        return
+    
+    locations = {'vertex_position': 0, 'vertex_shade': 1, 'instance_position': 2, 'instance_color': 3}
+    try:
+        program = compile_shader_program(BENSON_VERTEX_SHADER, BENSON_FRAGMENT_SHADER, locations)
+    except RuntimeError as error:
+        print(f"Enemy instancing disabled: {error}")
+        return
+    
+    # Bake draw_benson around neutral grey and keep each vertex color as an offset from it
+    # (one mesh per level of detail tier)
+    neutral = 0.5
+    meshes = []
+    for tier in range(len(lod_tier_detail)):
+        vertices = bake_draw_function(draw_benson, 0, 0, (neutral, neutral, neutral), tier=tier)
+        for i in range(0, len(vertices), 6):
+            vertices[i + 3] -= neutral
+            vertices[i + 4] -= neutral
+            vertices[i + 5] -= neutral
+        meshes.append((create_vertex_buffer(vertices), len(vertices) // 6))
+    
+    instance_buffer = glGenBuffers(1)
+    track_gl_objects('buffer', 1)
+    
+    benson_instancing.update(locations)
+    benson_instancing['program'] = program
+    benson_instancing['meshes'] = meshes
+    benson_instancing['instance_buffer'] = instance_buffer
+
+
+def draw_room_enemies(bensons):
+    """Draw all active enemies of a room - one instanced draw call per LOD tier when supported"""
+    if not (use_enemy_instancing and benson_instancing):
+        # Fallback: one draw_benson per enemy
+        for benson_index, benson in enumerate(bensons):
+            if benson[2] and sphere_in_frustum(benson[0], benson[1], 8, 12):  # If active (not defeated)
+                tier = lod_tier(('benson', game.current_room, benson_index), benson[0], benson[1], 8)
+                draw_benson(benson[0], benson[1], None, tier)
+        return
+    
+    # Per-instance data grouped by tier: x, y, r, g, b
+    r, g, b = level_configs[game.current_level]['enemy_color']
+    tier_data = [[] for _ in lod_tier_detail]
+    for benson_index, benson in enumerate(bensons):
+        if benson[2] and sphere_in_frustum(benson[0], benson[1], 8, 12):
+            tier = lod_tier(('benson', game.current_room, benson_index), benson[0], benson[1], 8)
+            tier_data[tier].extend((benson[0], benson[1], r, g, b))
+    instance_data = [value for data in tier_data for value in data]
+    if not instance_data:
+        return
+    
+    position = benson_instancing['vertex_position']
+    shade = benson_instancing['vertex_shade']
+    instance_position = benson_instancing['instance_position']
+    instance_color = benson_instancing['instance_color']
+    
+    glUseProgram(benson_instancing['program'])
+    glEnableVertexAttribArray(position)
+    glEnableVertexAttribArray(shade)
+    glEnableVertexAttribArray(instance_position)
+    glEnableVertexAttribArray(instance_color)
+    glVertexAttribDivisor(instance_position, 1)
+    glVertexAttribDivisor(instance_color, 1)
+    
+    # Per-enemy positions and color for all tiers in one upload
+    glBindBuffer(GL_ARRAY_BUFFER, benson_instancing['instance_buffer'])
+    glBufferData(GL_ARRAY_BUFFER, float_array(instance_data), GL_STREAM_DRAW)
+    
+    first_instance = 0
+    for (mesh_buffer, vertex_count), data in zip(benson_instancing['meshes'], tier_data):
+        instance_count = len(data) // 5
+        if instance_count == 0:
+            continue
+        
+        # Shared enemy mesh of this tier
+        glBindBuffer(GL_ARRAY_BUFFER, mesh_buffer)
+        glVertexAttribPointer(position, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
+        glVertexAttribPointer(shade, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+        
+        # This tier's slice of the instance data, advanced once per instance
+        offset = first_instance * 20
+        glBindBuffer(GL_ARRAY_BUFFER, benson_instancing['instance_buffer'])
+        glVertexAttribPointer(instance_position, 2, GL_FLOAT, GL_FALSE, 20, ctypes.c_void_p(offset))
+        glVertexAttribPointer(instance_color, 3, GL_FLOAT, GL_FALSE, 20, ctypes.c_void_p(offset + 8))
+        
+        glDrawArraysInstanced(GL_TRIANGLES, 0, vertex_count, instance_count)
+        first_instance += instance_count
+    
+    # Restore default state
+    glVertexAttribDivisor(instance_position, 0)
+    glVertexAttribDivisor(instance_color, 0)
+    for location in (position, shade, instance_position, instance_color):
+        glDisableVertexAttribArray(location)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glUseProgram(0)
+
+
 def draw_jessie(x, y, z):
     """Draw Jessie character for special power"""
+    if draw_baked_model('jessie', x, y, z):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, z)
     
@@ -704,6 +1360,9 @@ def draw_jessie(x, y, z):
 
 def draw_buzz(x, y, z):
     """Draw Buzz Lightyear character for special power"""
+    if draw_baked_model('buzz', x, y, z):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, z)
     
@@ -798,9 +1457,9 @@ def draw_red_ray(x, y, z, alpha):
     glPushMatrix()
     glTranslatef(x, y, z)
     glRotatef(90, 1, 0, 0)  # Point upward
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 5, 8, 200, 20, 20)  # Wide beam going up
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Outer glow
@@ -808,31 +1467,19 @@ def draw_red_ray(x, y, z, alpha):
     glPushMatrix()
     glTranslatef(x, y, z)
     glRotatef(90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 8, 12, 200, 20, 20)
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     glDisable(GL_BLEND)
 
 
 def draw_health_and_lives():
-    """Draw health meter and lives in top-left corner"""
-    # Switch to 2D orthographic projection
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, 1000, 0, 800)
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-    
+    """Draw health meter and lives in top-left corner (between begin_hud and end_hud)"""
     # Draw lives text
     glColor3f(1, 1, 1)  # White
-    glRasterPos2f(20, 760)
-    life_text = f"Life = {woody_lives}"
-    for ch in life_text:
-        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_18, ord(ch))
+    draw_hud_text(f"Life = {game.woody_lives}", 20, 760, GLUT_BITMAP_HELVETICA_18)
     
     # Health meter dimensions
     meter_x = 20
@@ -851,13 +1498,13 @@ def draw_health_and_lives():
     glEnd()
     
     # Calculate health fill height
-    fill_height = (woody_health / 100.0) * meter_height
+    fill_height = (game.woody_health / 100.0) * meter_height
     
     # Draw health fill (gradient from yellow at bottom to red at top based on health)
-    if woody_health > 0:
+    if game.woody_health > 0:
         # Bottom part is always yellow (healthy)
         # Top part transitions to red as health decreases
-        health_ratio = woody_health / 100.0
+        health_ratio = game.woody_health / 100.0
         
         # Color changes from yellow (healthy) to red (low health)
         if health_ratio > 0.5:
@@ -886,29 +1533,30 @@ def draw_health_and_lives():
     
     # Draw "HEALTH" label
     glColor3f(1, 1, 1)
-    glRasterPos2f(meter_x + 50, meter_y + 25)
-    health_label = "HEALTH"
-    for ch in health_label:
-        glutBitmapCharacter(GLUT_BITMAP_HELVETICA_12, ord(ch))
-    
-    glPopMatrix()
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    draw_hud_text("HEALTH", meter_x + 50, meter_y + 25, GLUT_BITMAP_HELVETICA_12)
 
 
 def draw_woody():
     """Draw Woody character"""
-    global lasso_attacking, lasso_attack_timer, woody_fade_alpha
-    
     glPushMatrix()
     
     # Position Woody
-    glTranslatef(woody_x, woody_y, woody_z)
-    glRotatef(woody_angle, 0, 0, 1)  # Rotate Woody
+    glTranslatef(game.woody_x, game.woody_y, game.woody_z)
+    glRotatef(game.woody_angle, 0, 0, 1)  # Rotate Woody
     
+    # Baked mesh has no alpha - only use it while Woody is fully visible
+    # (full detail - the chase camera always stays close to Woody)
+    if game.woody_fade_alpha < 1.0 or not draw_baked_model('woody', 0, 0, 0, 0):
+        draw_woody_body()
+    draw_woody_lasso()
+    
+    glPopMatrix()
+
+
+def draw_woody_body():
+    """Draw Woody's body, head, hat, arms and legs (in Woody's local space)"""
     # Body (brown/yellow cowboy vest)
-    glColor4f(0.8, 0.6, 0.2, woody_fade_alpha)  # Yellow/tan color with alpha
+    glColor4f(0.8, 0.6, 0.2, game.woody_fade_alpha)  # Yellow/tan color with alpha
     glPushMatrix()
     glTranslatef(0, 0, 10)
     glScalef(1.0, 0.7, 1.3)
@@ -916,14 +1564,14 @@ def draw_woody():
     glPopMatrix()
     
     # Head (skin color)
-    glColor4f(0.95, 0.8, 0.7, woody_fade_alpha)  # Skin tone with alpha
+    glColor4f(0.95, 0.8, 0.7, game.woody_fade_alpha)  # Skin tone with alpha
     glPushMatrix()
     glTranslatef(0, 0, 18)
     glutSolidSphere(4, 10, 10)
     glPopMatrix()
     
     # Brown hair
-    glColor4f(0.3, 0.2, 0.1, woody_fade_alpha)  # Dark brown with alpha
+    glColor4f(0.3, 0.2, 0.1, game.woody_fade_alpha)  # Dark brown with alpha
     glPushMatrix()
     glTranslatef(0, 0, 20)
     glScalef(1, 1, 0.7)
@@ -931,7 +1579,7 @@ def draw_woody():
     glPopMatrix()
     
     # Cowboy hat (brown)
-    glColor4f(0.4, 0.25, 0.15, woody_fade_alpha)  # Brown with alpha
+    glColor4f(0.4, 0.25, 0.15, game.woody_fade_alpha)  # Brown with alpha
     glPushMatrix()
     glTranslatef(0, 0, 22)
     # Hat crown (cube top)
@@ -939,7 +1587,7 @@ def draw_woody():
     glPopMatrix()
     
     # Arms
-    glColor4f(0.8, 0.6, 0.2, woody_fade_alpha)
+    glColor4f(0.8, 0.6, 0.2, game.woody_fade_alpha)
     # Left arm
     glPushMatrix()
     glTranslatef(-5, 0, 8)
@@ -955,7 +1603,7 @@ def draw_woody():
     glPopMatrix()
     
     # Legs (blue jeans)
-    glColor4f(0.2, 0.3, 0.6, woody_fade_alpha)  # Blue with alpha
+    glColor4f(0.2, 0.3, 0.6, game.woody_fade_alpha)  # Blue with alpha
     # Left leg
     glPushMatrix()
     glTranslatef(-2, 0, 2)
@@ -969,16 +1617,21 @@ def draw_woody():
     glScalef(0.4, 0.4, 1.2)
     glutSolidCube(4)
     glPopMatrix()
-    
+
+
+def draw_woody_lasso():
+    """Draw Woody's lasso, coiled or extended during an attack (in Woody's local space)"""
     # Lasso (coiled on right hand)
-    glColor4f(0.7, 0.5, 0.2, woody_fade_alpha)  # Rope color with alpha
+    glColor4f(0.7, 0.5, 0.2, game.woody_fade_alpha)  # Rope color with alpha
     
-    if lasso_attacking and lasso_attack_timer < lasso_attack_duration:
+    if game.lasso_attacking and game.lasso_attack_timer < lasso_attack_duration:
         # Lasso extended forward during attack
         glPushMatrix()
-        glTranslatef(5, 10 + lasso_attack_timer * 0.5, 8)
+        glTranslatef(5, 10 + game.lasso_attack_timer * 0.5, 8)
         glRotatef(90, 1, 0, 0)
-        gluCylinder(gluNewQuadric(), 0.6, 0.6, 15, 8, 8)
+        quad = acquire_quadric()
+        gluCylinder(quad, 0.6, 0.6, 15, 8, 8)
+        release_quadric(quad)
         # Lasso loop
         glTranslatef(0, 0, 15)
         glutSolidTorus(0.6, 2.5, 8, 10)
@@ -989,12 +1642,13 @@ def draw_woody():
         glTranslatef(5, 0, 8)
         glutSolidTorus(0.5, 1.5, 8, 10)
         glPopMatrix()
-    
-    glPopMatrix()
 
 
 def draw_gabby_gabby(x, y):
     """Draw Gabby Gabby character"""
+    if draw_baked_model('gabby_gabby', x, y, 0):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, 0)
     
@@ -1026,9 +1680,9 @@ def draw_gabby_gabby(x, y):
     glPushMatrix()
     glTranslatef(0, 5, 30)  # Position behind head
     glRotatef(90, 1, 0, 0)  # Rotate to point backward
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 1.5, 0.8, 8, 10, 10)  # Tapered ponytail
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Hair base/bun at back of head
@@ -1071,6 +1725,9 @@ def draw_gabby_gabby(x, y):
 
 def draw_lotso(x, y):
     """Draw Lotso bear character"""
+    if draw_baked_model('lotso', x, y, 0):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, 0)
     
@@ -1158,6 +1815,9 @@ def draw_lotso(x, y):
 
 def draw_potato_head(x, y):
     """Draw Mr. Potato Head character"""
+    if draw_baked_model('potato_head', x, y, 0):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, 0)
     
@@ -1216,18 +1876,18 @@ def draw_potato_head(x, y):
     glPushMatrix()
     glTranslatef(0, 0, 32)
     glRotatef(90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 6, 4, 5, 12, 12)
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Hat brim
     glPushMatrix()
     glTranslatef(0, 0, 32)
     glRotatef(90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluDisk(quad, 4, 8, 16, 1)
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Arms (detachable)
@@ -1265,6 +1925,9 @@ def draw_potato_head(x, y):
 
 def draw_bo_peep(x, y):
     """Draw Bo Peep character"""
+    if draw_baked_model('bo_peep', x, y, 0):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, 0)
     
@@ -1318,6 +1981,9 @@ def draw_bo_peep(x, y):
 
 def draw_buzz_caged(x, y):
     """Draw Buzz Lightyear character in cage"""
+    if draw_baked_model('buzz_caged', x, y, 0):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, 0)
     
@@ -1395,6 +2061,9 @@ def draw_buzz_caged(x, y):
 
 def draw_jessie_caged(x, y):
     """Draw Jessie character in cage"""
+    if draw_baked_model('jessie_caged', x, y, 0):
+        return
+    
     glPushMatrix()
     glTranslatef(x, y, 0)
     
@@ -1426,9 +2095,9 @@ def draw_jessie_caged(x, y):
     glPushMatrix()
     glTranslatef(0, 4, 20)
     glRotatef(90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 1.2, 0.8, 10, 8, 8)
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Yellow cowboy hat
@@ -1436,18 +2105,18 @@ def draw_jessie_caged(x, y):
     glPushMatrix()
     glTranslatef(0, 0, 27)
     glRotatef(90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 5, 3, 3, 12, 12)
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Hat brim
     glPushMatrix()
     glTranslatef(0, 0, 27)
     glRotatef(90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluDisk(quad, 3, 7, 16, 1)
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Blue jeans (legs)
@@ -1490,9 +2159,9 @@ def draw_cup_projectile(x, y):
     glColor3f(0.9, 0.9, 0.95)  # White/light gray
     glPushMatrix()
     glRotatef(-90, 1, 0, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 3, 2.5, 6, 10, 10)  # Cup shape
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     # Cup bottom
@@ -1512,26 +2181,42 @@ def draw_cup_projectile(x, y):
     glPopMatrix()
 
 
-def draw_blue_ball_projectile(x, y):
+def draw_blue_ball_projectile(x, y, tier=0):
     """Draw a blue ball projectile for Mr. Potato Head"""
     glPushMatrix()
     glTranslatef(x, y, 15)  # Float at head height
     
     # Blue ball
     glColor3f(0.2, 0.4, 0.9)  # Blue
-    glutSolidSphere(4, 12, 12)
+    glutSolidSphere(4, lod_detail(12, tier, 4), lod_detail(12, tier, 3))
     
     glPopMatrix()
 
 
-def draw_red_ball_projectile(x, y):
+def draw_red_ball_projectile(x, y, tier=0):
     """Draw a red ball projectile for Lotso bear"""
     glPushMatrix()
     glTranslatef(x, y, 15)  # Float at head height
     
     # Red ball
     glColor3f(0.9, 0.2, 0.2)  # Red
-    glutSolidSphere(4, 12, 12)
+    glutSolidSphere(4, lod_detail(12, tier, 4), lod_detail(12, tier, 3))
+    
+    glPopMatrix()
+
+
+def draw_thrown_stick(x, y, angle):
+    """Draw a stick flying through the air (bullet hell boss)"""
+    glPushMatrix()
+    glTranslatef(x, y, 15)  # Float at head height
+    glRotatef(angle, 0, 0, 1)  # Along its flight
+    
+    glColor3f(0.4, 0.25, 0.1)  # Dark brown
+    glTranslatef(-6, 0, 0)  # Centered on its position
+    glRotatef(90, 0, 1, 0)
+    quad = acquire_quadric()
+    gluCylinder(quad, 0.8, 0.8, 12, 6, 1)
+    release_quadric(quad)
     
     glPopMatrix()
 
@@ -1547,9 +2232,9 @@ def draw_stick_attack(x, y, angle):
     glPushMatrix()
     glTranslatef(15, 0, 0)  # Extend from Gabby
     glRotatef(90, 0, 1, 0)
-    quad = gluNewQuadric()
+    quad = acquire_quadric()
     gluCylinder(quad, 0.8, 0.8, 25, 8, 8)  # Long stick
-    gluDeleteQuadric(quad)
+    release_quadric(quad)
     glPopMatrix()
     
     glPopMatrix()
@@ -1619,139 +2304,68 @@ def draw_cage_with_alpha(x, y, alpha):
 
 def draw_museum_room():
     """Draw the current museum room with furniture"""
-    # Get level-specific colors
-    floor_color = level_configs[current_level]['floor_color']
-    wall_color = level_configs[current_level]['wall_color']
-    
-    # Floor (level-specific color)
-    glColor3f(*floor_color)
-    glBegin(GL_QUADS)
-    glVertex3f(-300, -300, 0)
-    glVertex3f(300, -300, 0)
-    glVertex3f(300, 300, 0)
-    glVertex3f(-300, 300, 0)
-    glEnd()
-    
-    # Walls (level-specific color)
-    glColor3f(*wall_color)
-    
-    # Back wall
-    glBegin(GL_QUADS)
-    glVertex3f(-300, 300, 0)
-    glVertex3f(300, 300, 0)
-    glVertex3f(300, 300, 200)
-    glVertex3f(-300, 300, 200)
-    glEnd()
-    
-    # Left wall
-    glBegin(GL_QUADS)
-    glVertex3f(-300, -300, 0)
-    glVertex3f(-300, 300, 0)
-    glVertex3f(-300, 300, 200)
-    glVertex3f(-300, -300, 200)
-    glEnd()
-    
-    # Right wall
-    glBegin(GL_QUADS)
-    glVertex3f(300, -300, 0)
-    glVertex3f(300, 300, 0)
-    glVertex3f(300, 300, 200)
-    glVertex3f(300, -300, 200)
-    glEnd()
-    
-    # Doors - Create openings in walls
-    door_width = 100  # Match the transition area width
-    door_height = 50
-    
-    # Last room - no back door, door closes when entered
-    if current_room == total_rooms - 1:
-        # No doors in final boss room
-        pass
+    # Floor, walls, door frames and furniture never move - replay them from the cache
+    simulation.profile_phase('room layout')
+    is_boss_room = game.current_room == game.total_rooms - 1
+    if is_boss_room:
+        # No doors and no furniture in final boss room
+        call_room_geometry(None, False, False)
     else:
-        if current_room > 0:  # Not first room - door at back
-            # Draw door frame at back wall
-            glColor3f(0.4, 0.3, 0.2)
-            # Left frame
-            glBegin(GL_QUADS)
-            glVertex3f(-door_width, 298, 0)
-            glVertex3f(-door_width + 5, 298, 0)
-            glVertex3f(-door_width + 5, 298, door_height)
-            glVertex3f(-door_width, 298, door_height)
-            glEnd()
-            # Right frame
-            glBegin(GL_QUADS)
-            glVertex3f(door_width - 5, 298, 0)
-            glVertex3f(door_width, 298, 0)
-            glVertex3f(door_width, 298, door_height)
-            glVertex3f(door_width - 5, 298, door_height)
-            glEnd()
-        
-        if current_room < total_rooms - 1:  # Not last room - door at front
-            # Draw door frame at front wall (player enters from here)
-            glColor3f(0.4, 0.3, 0.2)
-            # Left frame
-            glBegin(GL_QUADS)
-            glVertex3f(-door_width, -298, 0)
-            glVertex3f(-door_width + 5, -298, 0)
-            glVertex3f(-door_width + 5, -298, door_height)
-            glVertex3f(-door_width, -298, door_height)
-            glEnd()
-            # Right frame
-            glBegin(GL_QUADS)
-            glVertex3f(door_width - 5, -298, 0)
-            glVertex3f(door_width, -298, 0)
-            glVertex3f(door_width, -298, door_height)
-            glVertex3f(door_width - 5, -298, door_height)
-            glEnd()
-    
-    # Draw furniture based on room layout patterns
-    room_pattern = current_room % 5  # 5 different patterns
+        # Door at back unless first room, door at front (player enters from here)
+        call_room_geometry(game.current_room % 5, game.current_room > 0, True)
+    simulation.profile_phase('room')
     
     # Boss room - special layout
-    if current_room == total_rooms - 1:
+    if is_boss_room:
         # Empty room for boss fight
         # Draw Boss and Rescued Character if boss encounter has started
-        if boss_room_entered:
-            if gabby_visible:
+        if game.boss_room_entered:
+            if game.gabby_visible:
                 # Draw level-specific boss
-                boss_name = level_configs[current_level]['boss_name']
+                boss_name = level_configs[game.current_level]['boss_name']
                 if boss_name == 'potato_head':
-                    draw_potato_head(gabby_x, gabby_y)
+                    draw_potato_head(game.gabby_x, game.gabby_y)
                 elif boss_name == 'lotso':
-                    draw_lotso(gabby_x, gabby_y)
+                    draw_lotso(game.gabby_x, game.gabby_y)
                 else:
-                    draw_gabby_gabby(gabby_x, gabby_y)  # Gabby at her moving position
+                    draw_gabby_gabby(game.gabby_x, game.gabby_y)  # Gabby at her moving position
                 
                 # Draw stick attack if active
-                if gabby_attacking_with_stick:
-                    angle_to_woody = math.degrees(math.atan2(woody_y - gabby_y, woody_x - gabby_x))
-                    draw_stick_attack(gabby_x, gabby_y, angle_to_woody)
+                if game.gabby_attacking_with_stick:
+                    angle_to_woody = math.degrees(math.atan2(game.woody_y - game.gabby_y, game.woody_x - game.gabby_x))
+                    draw_stick_attack(game.gabby_x, game.gabby_y, angle_to_woody)
             
-            # Draw projectiles (level-specific)
-            boss_name = level_configs[current_level]['boss_name']
-            for cup in cup_projectiles:
-                if boss_name == 'potato_head':
-                    draw_blue_ball_projectile(cup[0], cup[1])
-                elif boss_name == 'lotso':
-                    draw_red_ball_projectile(cup[0], cup[1])
+            # Draw projectiles (balls are level-specific)
+            boss_name = level_configs[game.current_level]['boss_name']
+            projectiles = game.cup_projectiles
+            for index in range(len(projectiles)):
+                x = float(projectiles.x[index])
+                y = float(projectiles.y[index])
+                kind = projectiles.kind[index]
+                if kind == simulation.PROJECTILE_STICK:
+                    draw_thrown_stick(x, y, math.degrees(math.atan2(projectiles.dy[index], projectiles.dx[index])))
+                elif kind == simulation.PROJECTILE_CUP:
+                    draw_cup_projectile(x, y)
+                elif boss_name == 'potato_head':
+                    draw_blue_ball_projectile(x, y, lod_tier(('projectile', index), x, y, 15))
                 else:
-                    draw_cup_projectile(cup[0], cup[1])
+                    draw_red_ball_projectile(x, y, lod_tier(('projectile', index), x, y, 15))
             
-            if bo_peep_visible:
+            if game.bo_peep_visible:
                 # Get level-specific rescued character
-                rescue_character = level_configs[current_level]['rescue_character']
+                rescue_character = level_configs[game.current_level]['rescue_character']
                 
                 # Draw cage with fade effect during win sequence
-                if win_sequence_stage == 1 or (win_sequence_stage == 2 and cage_alpha > 0):
+                if game.win_sequence_stage == 1 or (game.win_sequence_stage == 2 and game.cage_alpha > 0):
                     # Cage still visible during camera turn and fade
-                    draw_cage_with_alpha(0, -200, cage_alpha)
+                    draw_cage_with_alpha(0, -200, game.cage_alpha)
                     if rescue_character == 'jessie':
                         draw_jessie_caged(0, -200)
                     elif rescue_character == 'buzz':
                         draw_buzz_caged(0, -200)
                     else:
                         draw_bo_peep(0, -200)  # Bo Peep inside cage
-                elif win_sequence_stage == 0 and not gabby_hit:
+                elif game.win_sequence_stage == 0 and not game.gabby_hit:
                     # Normal state - cage fully visible
                     draw_cage(0, -200)
                     if rescue_character == 'jessie':
@@ -1760,65 +2374,248 @@ def draw_museum_room():
                         draw_buzz_caged(0, -200)
                     else:
                         draw_bo_peep(0, -200)
-                elif win_sequence_stage >= 3:
+                elif game.win_sequence_stage >= 3:
                     # Character is free - draw at animated position
                     if rescue_character == 'jessie':
-                        draw_jessie(bo_peep_x, bo_peep_y, 0)  # Use draw_jessie without cage
+                        draw_jessie(game.bo_peep_x, game.bo_peep_y, 0)  # Use draw_jessie without cage
                     elif rescue_character == 'buzz':
-                        draw_buzz(bo_peep_x, bo_peep_y, 0)  # Use draw_buzz without cage
+                        draw_buzz(game.bo_peep_x, game.bo_peep_y, 0)  # Use draw_buzz without cage
                     else:
-                        draw_bo_peep(bo_peep_x, bo_peep_y)
-    elif room_pattern == 0:
-        draw_room_layout_1()
-    elif room_pattern == 1:
-        draw_room_layout_2()
-    elif room_pattern == 2:
-        draw_room_layout_3()
-    elif room_pattern == 3:
-        draw_room_layout_4()
-    else:
-        draw_room_layout_5()
+                        draw_bo_peep(game.bo_peep_x, game.bo_peep_y)
     
     # Draw collectibles (stars and hats)
-    if current_room < total_rooms - 1:  # Not in boss room
+    simulation.profile_phase('collectibles')
+    if game.current_room < game.total_rooms - 1:  # Not in boss room
         # Draw star if this room has one and it hasn't been collected
-        if current_room in rooms_with_stars and current_room not in collected_stars:
-            star_x, star_y = room_star_positions[current_room]
-            draw_star(star_x, star_y, item_animation_time)
+        if game.current_room in game.rooms_with_stars and game.current_room not in game.collected_stars:
+            star_x, star_y = game.room_star_positions[game.current_room]
+            if sphere_in_frustum(star_x, star_y, 40, 16):
+                draw_star(star_x, star_y, game.item_animation_time)
         
         # Draw hat if this room has one and it hasn't been collected
-        if current_room in rooms_with_hats and current_room not in collected_hats:
-            hat_x, hat_y = room_hat_positions[current_room]
-            draw_hat_collectible(hat_x, hat_y, item_animation_time)
+        if game.current_room in game.rooms_with_hats and game.current_room not in game.collected_hats:
+            hat_x, hat_y = game.room_hat_positions[game.current_room]
+            if sphere_in_frustum(hat_x, hat_y, 35, 16):
+                draw_hat_collectible(hat_x, hat_y, game.item_animation_time)
         
         # Draw coins for this room
-        if current_room in room_coins:
-            for coin_index, (coin_x, coin_y) in enumerate(room_coins[current_room]):
-                if (current_room, coin_index) not in collected_coins:
-                    draw_coin(coin_x, coin_y, item_animation_time + coin_index * 0.5)
+        if game.current_room in game.room_coins:
+            for coin_index, (coin_x, coin_y) in enumerate(game.room_coins[game.current_room]):
+                if (game.current_room, coin_index) not in game.collected_coins and sphere_in_frustum(coin_x, coin_y, 25, 12):
+                    tier = lod_tier(('coin', game.current_room, coin_index), coin_x, coin_y, 25)
+                    draw_coin(coin_x, coin_y, game.item_animation_time + coin_index * 0.5, tier)
         
         # Draw Bensons for this room
-        if current_room in room_bensons:
-            for benson_index, benson in enumerate(room_bensons[current_room]):
-                if benson[2]:  # If active (not defeated)
-                    draw_benson(benson[0], benson[1])
+        simulation.profile_phase('enemies')
+        if game.current_room in game.room_bensons:
+            draw_room_enemies(game.room_bensons[game.current_room])
+        simulation.profile_phase('room')
         
         # Draw Jessie if power is active
-        if jessie_power_active and jessie_animation_stage > 0:
-            draw_jessie(woody_x, woody_y, jessie_y_position)
+        if game.jessie_power_active and game.jessie_animation_stage > 0:
+            draw_jessie(game.woody_x, game.woody_y, game.jessie_y_position)
         
         # Draw Buzz if power is active
-        if buzz_power_active and buzz_animation_stage > 0:
-            draw_buzz(woody_x, woody_y, buzz_y_position)
+        if game.buzz_power_active and game.buzz_animation_stage > 0:
+            draw_buzz(game.woody_x, game.woody_y, game.buzz_y_position)
             
             # Draw red ray when shooting
-            if buzz_animation_stage >= 3 and buzz_ray_alpha > 0:
-                draw_red_ray(woody_x, woody_y, buzz_y_position + 18, buzz_ray_alpha)
+            if game.buzz_animation_stage >= 3 and game.buzz_ray_alpha > 0:
+                draw_red_ray(game.woody_x, game.woody_y, game.buzz_y_position + 18, game.buzz_ray_alpha)
     
     # Room number display for debugging
     glColor3f(0.8, 0.8, 0.8)
 
 
+def draw_room_static_geometry(room_pattern, back_door, front_door):
+    """Draw floor, walls, door frames and furniture of a room (nothing that moves)"""
+    draw_room_shell(back_door, front_door)
+    draw_room_furniture(room_pattern)
+
+
+def draw_room_shell(back_door, front_door):
+    """Draw floor, walls and door frames of a room"""
+    # Get level-specific colors
+    floor_color = level_configs[game.current_level]['floor_color']
+    wall_color = level_configs[game.current_level]['wall_color']
+    
+    # Floor (level-specific color)
+    glColor3f(*floor_color)
+    glBegin(GL_QUADS)
+    glVertex3f(-300, -300, 0)
+    glVertex3f(300, -300, 0)
+    glVertex3f(300, 300, 0)
+    glVertex3f(-300, 300, 0)
+    glEnd()
+    
+    # Walls (level-specific color)
+    glColor3f(*wall_color)
+    
+    # Back wall
+    glBegin(GL_QUADS)
+    glVertex3f(-300, 300, 0)
+    glVertex3f(300, 300, 0)
+    glVertex3f(300, 300, 200)
+    glVertex3f(-300, 300, 200)
+    glEnd()
+    
+    # Left wall
+    glBegin(GL_QUADS)
+    glVertex3f(-300, -300, 0)
+    glVertex3f(-300, 300, 0)
+    glVertex3f(-300, 300, 200)
+    glVertex3f(-300, -300, 200)
+    glEnd()
+    
+    # Right wall
+    glBegin(GL_QUADS)
+    glVertex3f(300, -300, 0)
+    glVertex3f(300, 300, 0)
+    glVertex3f(300, 300, 200)
+    glVertex3f(300, -300, 200)
+    glEnd()
+    
+    # Doors - Create openings in walls
+    door_width = 100  # Match the transition area width
+    door_height = 50
+    
+    if back_door:
+        # Draw door frame at back wall
+        glColor3f(0.4, 0.3, 0.2)
+        # Left frame
+        glBegin(GL_QUADS)
+        glVertex3f(-door_width, 298, 0)
+        glVertex3f(-door_width + 5, 298, 0)
+        glVertex3f(-door_width + 5, 298, door_height)
+        glVertex3f(-door_width, 298, door_height)
+        glEnd()
+        # Right frame
+        glBegin(GL_QUADS)
+        glVertex3f(door_width - 5, 298, 0)
+        glVertex3f(door_width, 298, 0)
+        glVertex3f(door_width, 298, door_height)
+        glVertex3f(door_width - 5, 298, door_height)
+        glEnd()
+    
+    if front_door:
+        # Draw door frame at front wall (player enters from here)
+        glColor3f(0.4, 0.3, 0.2)
+        # Left frame
+        glBegin(GL_QUADS)
+        glVertex3f(-door_width, -298, 0)
+        glVertex3f(-door_width + 5, -298, 0)
+        glVertex3f(-door_width + 5, -298, door_height)
+        glVertex3f(-door_width, -298, door_height)
+        glEnd()
+        # Right frame
+        glBegin(GL_QUADS)
+        glVertex3f(door_width - 5, -298, 0)
+        glVertex3f(door_width, -298, 0)
+        glVertex3f(door_width, -298, door_height)
+        glVertex3f(door_width - 5, -298, door_height)
+        glEnd()
+
+
+def draw_room_furniture(room_pattern):
+    """Draw the furniture of a room layout pattern"""
+    # Draw furniture based on room layout patterns (None = empty boss room)
+    if room_pattern == 0:
+        draw_room_layout_1()
+    elif room_pattern == 1:
+        draw_room_layout_2()
+    elif room_pattern == 2:
+        draw_room_layout_3()
+    elif room_pattern == 3:
+        draw_room_layout_4()
+    elif room_pattern == 4:
+        draw_room_layout_5()
+
+
+def call_room_geometry(room_pattern, back_door, front_door):
+    """Draw the cached room shell and the furniture tiles inside the view frustum"""
+    global room_geometry_cache_level
+    
+    if not use_room_geometry_cache:
+        draw_room_static_geometry(room_pattern, back_door, front_door)
+        return
+    
+    # Palette changed (new level) - throw away geometry compiled with the old colors
+    if room_geometry_cache_level != game.current_level:
+        for entry in room_geometry_cache.values():
+            delete_room_geometry(entry)
+        room_geometry_cache.clear()
+        lod_tiers.clear()  # Tier history of the old level's rooms
+        room_geometry_cache_level = game.current_level
+    
+    key = (room_pattern, back_door, front_door)
+    entry = room_geometry_cache.get(key)
+    if entry is None:
+        entry = compile_room_geometry(room_pattern, back_door, front_door)
+        if entry is None:
+            # Display lists not available - draw directly
+            draw_room_static_geometry(room_pattern, back_door, front_door)
+            return
+        room_geometry_cache[key] = entry
+    
+    glCallList(entry['shell'])
+    for vertex_buffer, vertex_count, bounds in entry['furniture_tiles']:
+        if box_in_frustum(*bounds):
+            draw_vertex_buffer(vertex_buffer, vertex_count)
+
+
+def compile_room_geometry(room_pattern, back_door, front_door):
+    """Compile the room shell into a display list and bake its furniture into culling tiles"""
+    # Buffers are created outside the display list (buffer commands are not compiled into lists)
+    furniture_tiles = []
+    if bool(glGenBuffers):
+        furniture_tiles = bake_furniture_tiles(room_pattern)
+    
+    shell = glGenLists(1)
+    if shell == 0:
+        for vertex_buffer, _, _ in furniture_tiles:
+            delete_vertex_buffer(vertex_buffer)
+        return None
+    track_gl_objects('display_list', 1)
+    glNewList(shell, GL_COMPILE)
+    draw_room_shell(back_door, front_door)
+    if not bool(glGenBuffers):
+        # No buffer objects - furniture goes into the display list and is never culled
+        draw_room_furniture(room_pattern)
+    glEndList()
+    return {'shell': shell, 'furniture_tiles': furniture_tiles}
+
+
+def delete_room_geometry(entry):
+    """Free the display list and furniture buffers of a cached room"""
+    glDeleteLists(entry['shell'], 1)
+    track_gl_objects('display_list', -1)
+    for vertex_buffer, _, _ in entry['furniture_tiles']:
+        delete_vertex_buffer(vertex_buffer)
+
+
+def bake_furniture_tiles(room_pattern):
+    """Bake a layout's furniture into vertex buffers per floor tile, with bounding boxes for culling"""
+    vertices = bake_draw_function(draw_room_furniture, room_pattern)
+    
+    # Bin triangles (3 vertices x 6 floats) into tiles by their center
+    tiles = {}
+    for i in range(0, len(vertices), 18):
+        triangle = vertices[i:i + 18]
+        center_x = (triangle[0] + triangle[6] + triangle[12]) / 3
+        center_y = (triangle[1] + triangle[7] + triangle[13]) / 3
+        tile = (int((center_x + 300) // furniture_tile_size), int((center_y + 300) // furniture_tile_size))
+        tiles.setdefault(tile, []).extend(triangle)
+    
+    furniture_tiles = []
+    for tile_vertices in tiles.values():
+        xs = tile_vertices[0::6]
+        ys = tile_vertices[1::6]
+        zs = tile_vertices[2::6]
+        bounds = (min(xs), min(ys), min(zs), max(xs), max(ys), max(zs))
+        furniture_tiles.append((create_vertex_buffer(tile_vertices), len(tile_vertices) // 6, bounds))
+    return furniture_tiles
+
+
 def draw_room_layout_1():
     """Layout with showcases along walls"""
     # Showcases on back wall
@@ -2125,10 +2922,7 @@ def draw_start_screen():
     # Large "Start" text in center
     glColor3f(1, 1, 1)  # White
     # Using a large font for Start text
-    glRasterPos2f(420, 400)
-    start_text = "START"
-    for char in start_text:
-        glutBitmapCharacter(GLUT_BITMAP_TIMES_ROMAN_24, ord(char))
+    draw_hud_text("START", 420, 400, GLUT_BITMAP_TIMES_ROMAN_24)
     
     glPopMatrix()
     glMatrixMode(GL_PROJECTION)
@@ -2162,10 +2956,7 @@ def draw_level_select_screen():
     
     # "Which level you want?" text at top
     glColor3f(1, 1, 1)  # White
-    glRasterPos2f(350, 650)
-    level_text = "Which level you want?"
-    for char in level_text:
-        glutBitmapCharacter(GLUT_BITMAP_TIMES_ROMAN_24, ord(char))
+    draw_hud_text("Which level you want?", 350, 650, GLUT_BITMAP_TIMES_ROMAN_24)
     
     # Three colored boxes for level selection
     # Box positions: x centers at 250, 500, 750; y from 300 to 500
@@ -2195,8 +2986,7 @@ def draw_level_select_screen():
     
     # Number "1" in box 1
     glColor3f(1, 1, 1)
-    glRasterPos2f(240, 390)
-    glutBitmapCharacter(GLUT_BITMAP_TIMES_ROMAN_24, ord('1'))
+    draw_hud_text("1", 240, 390, GLUT_BITMAP_TIMES_ROMAN_24)
     
     # Box 2 - Green
     glBegin(GL_QUADS)
@@ -2218,8 +3008,7 @@ def draw_level_select_screen():
     
     # Number "2" in box 2
     glColor3f(1, 1, 1)
-    glRasterPos2f(490, 390)
-    glutBitmapCharacter(GLUT_BITMAP_TIMES_ROMAN_24, ord('2'))
+    draw_hud_text("2", 490, 390, GLUT_BITMAP_TIMES_ROMAN_24)
     
     # Box 3 - Blue
     glBegin(GL_QUADS)
@@ -2241,8 +3030,7 @@ def draw_level_select_screen():
     
     # Number "3" in box 3
     glColor3f(1, 1, 1)
-    glRasterPos2f(740, 390)
-    glutBitmapCharacter(GLUT_BITMAP_TIMES_ROMAN_24, ord('3'))
+    draw_hud_text("3", 740, 390, GLUT_BITMAP_TIMES_ROMAN_24)
     
     glPopMatrix()
     glMatrixMode(GL_PROJECTION)
@@ -2252,626 +3040,20 @@ def draw_level_select_screen():
     glutSwapBuffers()
 
 
-def update_game():
-    """Update game logic"""
-    global woody_x, woody_y, woody_z, woody_angle
-    global woody_jump_velocity, woody_is_jumping, woody_on_ground
-    global lasso_attacking, lasso_attack_timer, lasso_damage_cooldown
-    global current_room, boss_room_entered, gabby_visible, bo_peep_visible
-    global gabby_hit, bo_peep_approaching, bo_peep_x, bo_peep_y, game_won
-    global win_sequence_stage, win_sequence_timer, cage_alpha, camera_target_angle
-    global show_mission_complete, show_game_end
-    global woody_health, woody_lives, woody_score
-    global item_animation_time, collected_stars, collected_hats, collected_coins
-    global gabby_x, gabby_y, gabby_health, gabby_move_timer, gabby_move_direction
-    global cup_projectiles, gabby_cup_attack_timer, gabby_stick_attack_timer
-    global gabby_proximity_timer, gabby_is_close, gabby_attacking_with_stick
-    global jessie_power_active, jessie_animation_stage, jessie_y_position
-    global jessie_power_cooldown, jessie_animation_timer, bensons_frozen
-    global buzz_power_active, buzz_animation_stage, buzz_y_position
-    global buzz_power_cooldown, buzz_animation_timer, buzz_ray_alpha
-    global game_state, game_over_timer, woody_fade_alpha, show_game_over_text
-    global show_level_text, level_text_timer
-    
-    # Update level text timer
-    if show_level_text:
-        level_text_timer += 1
-        if level_text_timer >= level_text_duration:
-            show_level_text = False
-            level_text_timer = 0
-    
-    # Update animation timer (slower for gentler animations)
-    item_animation_time += 0.02
-    
-    # Decrement lasso damage cooldown
-    if lasso_damage_cooldown > 0:
-        lasso_damage_cooldown -= 1
-    
-    # Decrement Jessie power cooldown
-    if jessie_power_cooldown > 0:
-        jessie_power_cooldown -= 1
-    
-    # Handle Jessie special power activation (works in all rooms including boss room)
-    # Check if special powers are enabled for current level
-    powers_enabled = level_configs[current_level]['special_powers_enabled']
-    if powers_enabled == True or powers_enabled == 'jessie_only':
-        if keys_pressed.get('j', False) and not jessie_power_active and jessie_power_cooldown == 0:
-            # Activate Jessie power
-            jessie_power_active = True
-            jessie_animation_stage = 1  # Start descending
-            jessie_y_position = 200  # Start from top
-            jessie_animation_timer = 0
-            keys_pressed['j'] = False  # Reset key
-    
-    # Decrement Buzz power cooldown
-    if buzz_power_cooldown > 0:
-        buzz_power_cooldown -= 1
-    
-    # Handle Buzz special power activation (only when fully enabled, not jessie_only)
-    powers_enabled = level_configs[current_level]['special_powers_enabled']
-    if powers_enabled == True:  # Not False and not 'jessie_only'
-        if keys_pressed.get('b', False) and not buzz_power_active and buzz_power_cooldown == 0:
-            # Activate Buzz power (works everywhere including boss room)
-            buzz_power_active = True
-            buzz_animation_stage = 1  # Start descending
-            buzz_y_position = 200  # Start from top
-            buzz_animation_timer = 0
-            buzz_ray_alpha = 0.0
-            keys_pressed['b'] = False  # Reset key
-    
-    # Update Jessie animation
-    if jessie_power_active:
-        jessie_animation_timer += 1
-        
-        if jessie_animation_stage == 1:  # Descending
-            jessie_y_position -= 1.5  # Slower descend speed (was 3)
-            if jessie_y_position <= 0:  # Landed
-                jessie_y_position = 0
-                jessie_animation_stage = 2
-                jessie_animation_timer = 0
-                # Freeze all Bensons in current room (doesn't affect Gabby)
-                if current_room < total_rooms - 1:  # Only freeze Bensons in non-boss rooms
-                    bensons_frozen = True
-        
-        elif jessie_animation_stage == 2:  # Landed - stay visible
-            if jessie_animation_timer > 300:  # Stay for 5 seconds (300 frames at 60 FPS)
-                jessie_animation_stage = 3
-                jessie_animation_timer = 0
-        
-        elif jessie_animation_stage == 3:  # Disappearing
-            if jessie_animation_timer > 30:  # Slower disappear (was 10)
-                jessie_power_active = False
-                jessie_animation_stage = 0
-                jessie_power_cooldown = jessie_power_cooldown_max  # 1 minute cooldown
-    
-    # Update Buzz animation
-    if buzz_power_active:
-        buzz_animation_timer += 1
-        
-        if buzz_animation_stage == 1:  # Descending
-            buzz_y_position -= 1.5  # Slower descend speed (was 3)
-            if buzz_y_position <= 0:  # Landed
-                buzz_y_position = 0
-                buzz_animation_stage = 2
-                buzz_animation_timer = 0
-        
-        elif buzz_animation_stage == 2:  # Landed briefly
-            if buzz_animation_timer > 40:  # Longer pause before shooting (was 10)
-                buzz_animation_stage = 3
-                buzz_animation_timer = 0
-        
-        elif buzz_animation_stage == 3:  # Shooting ray
-            # Fade in red ray slowly
-            buzz_ray_alpha = min(1.0, buzz_animation_timer / 40.0)  # Slower fade in (was 20)
-            
-            if buzz_animation_timer == 30:  # Ray reaches full power (was 15)
-                # Remove all Bensons in current room
-                if current_room in room_bensons:
-                    for benson in room_bensons[current_room]:
-                        benson[2] = False  # Mark as inactive (disappeared)
-                
-                # Damage Gabby Gabby if in boss room
-                if current_room == total_rooms - 1 and gabby_visible and not gabby_hit:
-                    gabby_health -= 10  # 10 damage at once
-                    if gabby_health <= 0:
-                        gabby_health = 0
-            
-            if buzz_animation_timer > 180:  # Hold ray much longer (was 40) - about 3 seconds
-                buzz_animation_stage = 4
-                buzz_animation_timer = 0
-        
-        elif buzz_animation_stage == 4:  # Disappearing
-            # Fade out ray slowly
-            buzz_ray_alpha = max(0.0, 1.0 - (buzz_animation_timer / 60.0))  # Slower fade out (was 10)
-            
-            if buzz_animation_timer > 60:  # Slower disappear (was 15)
-                buzz_power_active = False
-                buzz_animation_stage = 0
-                buzz_ray_alpha = 0.0
-                buzz_power_cooldown = buzz_power_cooldown_max  # 2 minutes cooldown
-    
-    # Check for collectible pickup
-    if current_room < total_rooms - 1:
-        pickup_radius = 25  # Distance to collect items
-        
-        # Check star collection
-        if current_room in rooms_with_stars and current_room not in collected_stars:
-            star_x, star_y = room_star_positions[current_room]
-            dx = woody_x - star_x
-            dy = woody_y - star_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            if distance < pickup_radius:
-                collected_stars.add(current_room)
-                # Fully restore health to 100%
-                woody_health = 100
-        
-        # Check hat collection
-        if current_room in rooms_with_hats and current_room not in collected_hats:
-            hat_x, hat_y = room_hat_positions[current_room]
-            dx = woody_x - hat_x
-            dy = woody_y - hat_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            if distance < pickup_radius:
-                collected_hats.add(current_room)
-                # Increase lives
-                woody_lives += 1
-        
-        # Check coin collection
-        if current_room in room_coins:
-            for coin_index, (coin_x, coin_y) in enumerate(room_coins[current_room]):
-                if (current_room, coin_index) not in collected_coins:
-                    dx = woody_x - coin_x
-                    dy = woody_y - coin_y
-                    distance = math.sqrt(dx*dx + dy*dy)
-                    if distance < pickup_radius:
-                        collected_coins.add((current_room, coin_index))
-                        # Increase score by 10
-                        woody_score += 10
-    
-    # Update Bensons (enemies)
-    if current_room in room_bensons and current_room < total_rooms - 1:
-        for benson_index, benson in enumerate(room_bensons[current_room]):
-            if benson[2]:  # If active
-                benson_x, benson_y = benson[0], benson[1]
-                
-                # Bensons move toward Woody (very slow) - but not if frozen
-                if not bensons_frozen:
-                    dx = woody_x - benson_x
-                    dy = woody_y - benson_y
-                    distance_to_woody = math.sqrt(dx*dx + dy*dy)
-                    
-                    if distance_to_woody > 0:
-                        # Normalize and move toward Woody
-                        benson[0] += (dx / distance_to_woody) * benson_speed
-                        benson[1] += (dy / distance_to_woody) * benson_speed
-                else:
-                    # Bensons are frozen, calculate distance but don't move
-                    dx = woody_x - benson_x
-                    dy = woody_y - benson_y
-                    distance_to_woody = math.sqrt(dx*dx + dy*dy)
-                
-                # Decrement hit cooldown
-                if benson[3] > 0:
-                    benson[3] -= 1
-                
-                # Check collision with Woody (damage)
-                if distance_to_woody < 15 and benson[3] == 0:
-                    woody_health -= 5  # 5% damage
-                    benson[3] = 60  # 1 second cooldown before next damage
-                
-                # Check if hit by lasso
-                if lasso_attacking and (current_room, benson_index) not in benson_hit_by_lasso:
-                    lasso_reach = 30
-                    lasso_x = woody_x + lasso_reach * math.cos(math.radians(woody_angle))
-                    lasso_y = woody_y + lasso_reach * math.sin(math.radians(woody_angle))
-                    
-                    lasso_dx = lasso_x - benson_x
-                    lasso_dy = lasso_y - benson_y
-                    lasso_distance = math.sqrt(lasso_dx*lasso_dx + lasso_dy*lasso_dy)
-                    
-                    if lasso_distance < 35:  # Hit range
-                        benson[2] = False  # Deactivate (defeated)
-                        benson_hit_by_lasso.add((current_room, benson_index))
-                        woody_score += 50  # +50 score for defeating Benson
-    
-    # Check health and lives
-    if woody_health <= 0:
-        woody_lives -= 1
-        if woody_lives > 0:
-            # Reset health but lose a life
-            woody_health = 100
-        else:
-            # Game over - trigger game over state
-            woody_lives = 0
-            woody_health = 0
-            game_state = "game_over"
-            game_over_timer = 0
-            woody_fade_alpha = 1.0
-            show_game_over_text = False
-    
-    # Game over animation logic
-    if game_state == "game_over":
-        game_over_timer += 1
-        
-        # VERY slow fade out of Woody (600 frames = 10 seconds at 60 FPS)
-        if game_over_timer <= 600:
-            woody_fade_alpha = 1.0 - (game_over_timer / 600.0)
-        else:
-            woody_fade_alpha = 0.0
-            # Show "Game Over" text slowly after Woody disappears (after 10 seconds)
-            if game_over_timer > 600:
-                show_game_over_text = True
-        
-        return  # Don't process other game logic during game over
-    
-    # Boss fight logic (Gabby Gabby AI and attacks)
-    if boss_room_entered and gabby_visible and not gabby_hit and win_sequence_stage == 0:
-        # Calculate distance to Woody
-        dx = woody_x - gabby_x
-        dy = woody_y - gabby_y
-        distance_to_woody = math.sqrt(dx*dx + dy*dy)
-        
-        # Gabby's movement AI - move randomly around the room
-        gabby_move_timer += 1
-        if gabby_move_timer > 200:  # Change direction every 3.3 seconds (slower)
-            gabby_move_timer = 0
-            gabby_move_direction = random.randint(0, 360)
-        
-        # Move Gabby
-        move_x = gabby_move_speed * math.cos(math.radians(gabby_move_direction))
-        move_y = gabby_move_speed * math.sin(math.radians(gabby_move_direction))
-        
-        # Keep Gabby in bounds (entire room)
-        new_gabby_x = gabby_x + move_x
-        new_gabby_y = gabby_y + move_y
-        if -270 < new_gabby_x < 270:  # Expanded to almost full room width
-            gabby_x = new_gabby_x
-        else:
-            gabby_move_direction = 180 - gabby_move_direction  # Bounce off wall
-        if -270 < new_gabby_y < 270:  # Expanded to almost full room length
-            gabby_y = new_gabby_y
-        else:
-            gabby_move_direction = -gabby_move_direction  # Bounce off wall
-        
-        # Check if Woody is close for stick attack
-        if distance_to_woody < gabby_close_range:
-            if not gabby_is_close:
-                # Woody just got close, start proximity timer
-                gabby_is_close = True
-                gabby_proximity_timer = 0
-            else:
-                # Woody is staying close, increment timer
-                gabby_proximity_timer += 1
-                
-                # After 4 seconds (240 frames), start attacking with stick
-                if gabby_proximity_timer >= gabby_stick_attack_cooldown:
-                    gabby_stick_attack_timer += 1
-                    
-                    if gabby_stick_attack_timer >= gabby_stick_attack_cooldown:
-                        # Execute stick attack
-                        gabby_attacking_with_stick = True
-                        gabby_stick_attack_timer = 0
-                        
-                        # Deal damage to Woody
-                        woody_health -= 10  # 10% damage
-        else:
-            # Woody moved away, reset proximity timer
-            gabby_is_close = False
-            gabby_proximity_timer = 0
-            gabby_stick_attack_timer = 0
-        
-        # Stick attack animation countdown
-        if gabby_attacking_with_stick:
-            if gabby_proximity_timer < stick_attack_duration:
-                pass  # Animation playing
-            else:
-                gabby_attacking_with_stick = False
-        
-        # Ranged cup attack when far away
-        if distance_to_woody > gabby_far_range:
-            gabby_cup_attack_timer += 1
-            
-            if gabby_cup_attack_timer >= gabby_cup_attack_cooldown:
-                # Throw cup toward Woody
-                angle_to_woody = math.atan2(dy, dx)
-                cup_speed = 0.5  # Even slower projectile speed
-                cup_dx = cup_speed * math.cos(angle_to_woody)
-                cup_dy = cup_speed * math.sin(angle_to_woody)
-                
-                # Create new cup projectile
-                cup_projectiles.append([gabby_x, gabby_y, cup_dx, cup_dy, 0])  # x, y, dx, dy, lifetime
-                gabby_cup_attack_timer = 0
-    
-    # Update cup projectiles
-    cups_to_remove = []
-    for i, cup in enumerate(cup_projectiles):
-        # Move cup
-        cup[0] += cup[2]  # x += dx
-        cup[1] += cup[3]  # y += dy
-        cup[4] += 1  # increment lifetime
-        
-        # Check collision with Woody
-        dx = woody_x - cup[0]
-        dy = woody_y - cup[1]
-        distance = math.sqrt(dx*dx + dy*dy)
-        
-        if distance < 15:  # Hit Woody
-            woody_health -= 5  # 5% damage
-            cups_to_remove.append(i)
-        elif abs(cup[0]) > 500 or abs(cup[1]) > 500:  # Only remove when very far out of room
-            cups_to_remove.append(i)
-    
-    # Remove old cups
-    for i in reversed(cups_to_remove):
-        cup_projectiles.pop(i)
-    
-    # Handle win sequence stages
-    if win_sequence_stage > 0:
-        win_sequence_timer += 1
-        
-        if win_sequence_stage == 1:  # Camera turning toward cage
-            # Calculate angle to look at cage from Woody's position
-            cage_x, cage_y = 0, -200
-            target_angle = math.degrees(math.atan2(cage_y - woody_y, cage_x - woody_x))
-            
-            # Smoothly rotate camera (very slow)
-            angle_diff = target_angle - woody_angle
-            # Normalize angle difference to -180 to 180
-            while angle_diff > 180:
-                angle_diff -= 360
-            while angle_diff < -180:
-                angle_diff += 360
-            
-            if abs(angle_diff) > 0.5:
-                woody_angle += angle_diff * 0.015  # Very slow rotation
-                if woody_angle < 0:
-                    woody_angle += 360
-                if woody_angle >= 360:
-                    woody_angle -= 360
-            else:
-                # Camera focused on cage, move to next stage
-                win_sequence_stage = 2
-                win_sequence_timer = 0
-        
-        elif win_sequence_stage == 2:  # Cage fading
-            # Fade out cage over 200 frames (~3.3 seconds)
-            cage_alpha -= 0.005  # Slow fade
-            if cage_alpha <= 0:
-                cage_alpha = 0
-                win_sequence_stage = 3
-                win_sequence_timer = 0
-                bo_peep_approaching = True
-        
-        elif win_sequence_stage == 3:  # Bo Peep approaching
-            # Move Bo Peep toward Woody
-            dx = woody_x - bo_peep_x
-            dy = woody_y - bo_peep_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > 5:  # Still approaching
-                # Move toward Woody very slowly
-                move_amount = 0.5  # Slow approach speed
-                bo_peep_x += (dx / distance) * move_amount
-                bo_peep_y += (dy / distance) * move_amount
-            else:
-                # Reached Woody - start hugging
-                win_sequence_stage = 4
-                win_sequence_timer = 0
-                bo_peep_approaching = False
-        
-        elif win_sequence_stage == 4:  # Hugging
-            # Wait 5 seconds (300 frames at 60fps)
-            if win_sequence_timer >= 300:
-                win_sequence_stage = 5
-                win_sequence_timer = 0
-                show_mission_complete = True
-        
-        elif win_sequence_stage == 5:  # Mission Complete displayed
-            # Wait 3 seconds (180 frames)
-            if win_sequence_timer >= 180:
-                # Check if there's a next level
-                if current_level < 3:
-                    # Move to next level
-                    win_sequence_stage = 6
-                    win_sequence_timer = 0
-                    show_level_text = True  # Show "Level Complete" message
-                else:
-                    # Final level completed - game end
-                    win_sequence_stage = 6
-                    win_sequence_timer = 0
-                    show_game_end = True
-        
-        elif win_sequence_stage == 6:  # Level transition or Game End
-            if current_level < 3:
-                # Wait 2 seconds then move to next level
-                if win_sequence_timer >= 120:
-                    next_level = current_level + 1
-                    initialize_level(next_level)
-                    # Reset win sequence
-                    win_sequence_stage = 0
-                    show_mission_complete = False
-                    show_level_text = True
-                    level_text_timer = 0
-            else:
-                # Stay at this stage (final game end)
-                pass
-        
-        return  # Don't process normal game logic during win sequence
-    
-    # If Gabby is hit, stop player movement (but not in win sequence yet)
-    if gabby_hit:
-        return
-    
-    # Constants for collision and doors
-    collision_radius = 10  # Woody's collision radius
-    door_width = 100  # Width of door area
-    
-    # Movement with wall collision only (furniture collision disabled)
-    if keys_pressed['up']:
-        # Calculate new position
-        new_x = woody_x + move_speed * math.cos(math.radians(woody_angle))
-        new_y = woody_y + move_speed * math.sin(math.radians(woody_angle))
-        
-        # Check X boundaries (left and right walls)
-        if new_x >= -280 + collision_radius and new_x <= 280 - collision_radius:
-            woody_x = new_x
-        
-        # Check Y boundaries - allow going beyond if in door area
-        if abs(woody_x) < door_width:
-            # In door area - allow movement beyond normal bounds for door transition
-            if new_y >= -295 and new_y <= 295:
-                woody_y = new_y
-        else:
-            # Not in door area - enforce wall collision
-            if new_y >= -285 + collision_radius and new_y <= 285 - collision_radius:
-                woody_y = new_y
-    
-    if keys_pressed['down']:
-        # Calculate new position
-        new_x = woody_x - move_speed * math.cos(math.radians(woody_angle))
-        new_y = woody_y - move_speed * math.sin(math.radians(woody_angle))
-        
-        # Check X boundaries (left and right walls)
-        if new_x >= -280 + collision_radius and new_x <= 280 - collision_radius:
-            woody_x = new_x
-        
-        # Check Y boundaries - allow going beyond if in door area
-        if abs(woody_x) < door_width:
-            # In door area - allow movement beyond normal bounds for door transition
-            if new_y >= -295 and new_y <= 295:
-                woody_y = new_y
-        else:
-            # Not in door area - enforce wall collision
-            if new_y >= -285 + collision_radius and new_y <= 285 - collision_radius:
-                woody_y = new_y
-    
-    # Rotation
-    if keys_pressed['left']:
-        woody_angle += rotation_speed
-        if woody_angle >= 360:
-            woody_angle -= 360
-    
-    if keys_pressed['right']:
-        woody_angle -= rotation_speed
-        if woody_angle < 0:
-            woody_angle += 360
-    
-    # Jumping
-    if woody_is_jumping:
-        woody_z += woody_jump_velocity
-        woody_jump_velocity -= gravity
-        
-        if woody_z <= 0:
-            woody_z = 0
-            woody_is_jumping = False
-            woody_on_ground = True
-            woody_jump_velocity = 0
-    
-    # Lasso attack
-    if lasso_attacking:
-        lasso_attack_timer += 1
-        if lasso_attack_timer >= lasso_attack_duration:
-            lasso_attacking = False
-            lasso_attack_timer = 0
-        
-        # Check collision with Gabby in boss room
-        if boss_room_entered and gabby_visible and not gabby_hit:
-            # Gabby is at position (0, -100)
-            gabby_x = 0
-            gabby_y = -100
-            
-            # Calculate lasso reach (in front of Woody)
-            lasso_reach = 30  # Distance lasso extends
-            lasso_x = woody_x + lasso_reach * math.cos(math.radians(woody_angle))
-            lasso_y = woody_y + lasso_reach * math.sin(math.radians(woody_angle))
-            
-            # Check distance to Gabby
-            dx = lasso_x - gabby_x
-            dy = lasso_y - gabby_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance < 40:  # Hit range
-                # Gabby is hit! Reduce her health (only if cooldown expired)
-                if lasso_damage_cooldown == 0:
-                    gabby_health -= 1
-                    lasso_damage_cooldown = 30  # 0.5 second cooldown to prevent multiple hits
-                
-                # Check if Gabby is defeated
-                if gabby_health <= 0:
-                    gabby_hit = True
-                    gabby_visible = False
-                    woody_score += 100  # +100 score for defeating Gabby
-                    # Start win sequence - Woody stops moving and turns to Bo Peep
-                    win_sequence_stage = 1
-                    win_sequence_timer = 0
-    
-    # Check for room transitions through doors
-    # Front door (at -Y) → Next room
-    if woody_y <= -290 and abs(woody_x) < door_width and current_room < total_rooms - 1:
-        current_room += 1
-        woody_y = 280  # Enter from back of new room
-        
-        # Unfreeze Bensons when changing rooms
-        bensons_frozen = False
-        
-        # Check if entering boss room
-        if current_room == total_rooms - 1:
-            boss_room_entered = True
-            gabby_visible = True
-            bo_peep_visible = True
-            # Initialize boss position and health for boss fight
-            gabby_x = 0
-            gabby_y = -100
-            # Set boss health based on level
-            boss_name = level_configs[current_level]['boss_name']
-            if boss_name == 'potato_head':
-                gabby_health = 20  # Mr. Potato Head - 20 hits required
-            elif boss_name == 'lotso':
-                gabby_health = 30  # Lotso bear - 30 hits required
-            else:
-                gabby_health = 50  # Gabby Gabby - 50 hits required
-            gabby_cup_attack_timer = 0
-            gabby_stick_attack_timer = 0
-            gabby_proximity_timer = 0
-            gabby_is_close = False
-            gabby_attacking_with_stick = False
-            cup_projectiles.clear()
-        return
-    
-    # Back door (at +Y) → Previous room (NOT allowed in boss room 15)
-    # Woody can go back from any room except room 15 (boss room)
-    if woody_y >= 290 and abs(woody_x) < door_width and current_room > 0 and current_room < total_rooms - 1:
-        current_room -= 1
-        woody_y = -280  # Enter from front of previous room
-        
-        # Unfreeze Bensons when changing rooms
-        bensons_frozen = False
-        return
-    
-    # Clamp Woody's position to room bounds (failsafe) - but allow extra space in door areas
-    if abs(woody_x) < door_width:
-        # In door area - wider Y bounds
-        woody_y = max(-295, min(295, woody_y))
-    else:
-        # Not in door area - normal bounds
-        woody_y = max(-285 + collision_radius, min(285 - collision_radius, woody_y))
-    
-    woody_x = max(-280 + collision_radius, min(280 - collision_radius, woody_x))
-
-
 def showScreen():
     """Main display function"""
-    global game_state, fade_alpha, fade_timer
+    if gl_counted_functions:
+        end_gl_counter_frame()
     
-    if game_state == "menu":
+    if game.game_state == "menu":
         draw_start_screen()
         return
     
-    elif game_state == "level_select":
+    elif game.game_state == "level_select":
         draw_level_select_screen()
         return
     
-    elif game_state == "fade":
+    elif game.game_state == "fade":
         # Fade to black transition
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glMatrixMode(GL_PROJECTION)
@@ -2896,123 +3078,134 @@ def showScreen():
         glMatrixMode(GL_MODELVIEW)
         
         glutSwapBuffers()
-        
-        fade_timer += 1
-        if fade_timer > 30:  # Fade duration
-            # Initialize the selected level
-            initialize_level(selected_level)
-            game_state = "playing"
-            fade_timer = 0
         return
     
-    elif game_state == "game_over":
+    elif game.game_state == "game_over":
         # Game over screen with fading Woody and message
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         glLoadIdentity()
         
         # Camera setup same as playing state
-        camera_x = woody_x - camera_distance * math.cos(math.radians(woody_angle))
-        camera_y = woody_y - camera_distance * math.sin(math.radians(woody_angle))
-        camera_z = woody_z + camera_height
+        camera_x = game.woody_x - camera_distance * math.cos(math.radians(game.woody_angle))
+        camera_y = game.woody_y - camera_distance * math.sin(math.radians(game.woody_angle))
+        camera_z = game.woody_z + camera_height
         
         gluLookAt(camera_x, camera_y, camera_z,
-                  woody_x, woody_y, woody_z + 10,
+                  game.woody_x, game.woody_y, game.woody_z + 10,
                   0, 0, 1)
+        set_view_frustum((camera_x, camera_y, camera_z), (game.woody_x, game.woody_y, game.woody_z + 10))
         
         # Draw scene
         draw_museum_room()
         
         # Draw Woody with transparency (fading out)
-        if woody_fade_alpha > 0:
+        if game.woody_fade_alpha > 0:
             glEnable(GL_BLEND)
             glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
             draw_woody()
             glDisable(GL_BLEND)
         
         # Display "Game Over" text after Woody disappears
-        if show_game_over_text:
+        if game.show_game_over_text:
             glColor3f(1, 0, 0)  # Red color
             draw_text("GAME OVER", 400, 400, GLUT_BITMAP_TIMES_ROMAN_24)
         
+        check_gl_object_leaks()
         glutSwapBuffers()
         return
     
     # Playing state
+    simulation.profile_phase('room')
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
     
+    # Draw moving objects between the last two simulation ticks
+    tick_state = apply_render_interpolation()
+    
     # Camera follows Woody from behind
-    camera_x = woody_x - camera_distance * math.cos(math.radians(woody_angle))
-    camera_y = woody_y - camera_distance * math.sin(math.radians(woody_angle))
-    camera_z = woody_z + camera_height
+    camera_x = game.woody_x - camera_distance * math.cos(math.radians(game.woody_angle))
+    camera_y = game.woody_y - camera_distance * math.sin(math.radians(game.woody_angle))
+    camera_z = game.woody_z + camera_height
     
     gluLookAt(camera_x, camera_y, camera_z,
-              woody_x, woody_y, woody_z + 10,
+              game.woody_x, game.woody_y, game.woody_z + 10,
               0, 0, 1)
+    set_view_frustum((camera_x, camera_y, camera_z), (game.woody_x, game.woody_y, game.woody_z + 10))
     
     # Draw scene
     draw_museum_room()
+    simulation.profile_phase('woody')
     draw_woody()
+    restore_tick_state(tick_state)
+    
+    # HUD - one orthographic projection for all 2D overlays
+    simulation.profile_phase('hud')
+    begin_hud()
     
     # Display health and lives
     draw_health_and_lives()
     
     # Display score at top right corner (gold color like coins)
     glColor3f(1.0, 0.84, 0.0)
-    draw_text(f"SCORE: {woody_score}", 830, 760, GLUT_BITMAP_HELVETICA_18)
+    draw_hud_text(f"SCORE: {game.woody_score}", 830, 760, GLUT_BITMAP_HELVETICA_18)
     
     # Display room number below score
     glColor3f(1, 1, 1)
-    draw_text(f"ROOM {current_room + 1}/{total_rooms}", 830, 730, GLUT_BITMAP_HELVETICA_18)
+    draw_hud_text(f"ROOM {game.current_room + 1}/{game.total_rooms}", 830, 730, GLUT_BITMAP_HELVETICA_18)
+    
+    # Culling counters for this frame (debug)
+    if show_cull_stats:
+        draw_hud_text(f"DRAWN {cull_stats['drawn']}  CULLED {cull_stats['culled']}", 830, 705, GLUT_BITMAP_HELVETICA_12)
     
     # Display level text at top center
-    if show_level_text:
-        if win_sequence_stage == 6 and current_level < 3:
+    if game.show_level_text:
+        if game.win_sequence_stage == 6 and simulation.next_level(game.current_level) is not None:
             # Show "Level Complete" during level transition
             glColor3f(0, 1, 0)  # Green
-            draw_text("LEVEL COMPLETE", 370, 760, GLUT_BITMAP_TIMES_ROMAN_24)
+            draw_hud_text("LEVEL COMPLETE", 370, 760, GLUT_BITMAP_TIMES_ROMAN_24)
         else:
             # Show "Level N" at level start
             glColor3f(1, 1, 1)  # White
-            draw_text(f"LEVEL {current_level}", 420, 760, GLUT_BITMAP_TIMES_ROMAN_24)
+            draw_hud_text(f"LEVEL {game.current_level}", 420, 760, GLUT_BITMAP_TIMES_ROMAN_24)
     
     # Display win sequence text
-    if show_mission_complete:
+    if game.show_mission_complete:
         glColor3f(1, 1, 0)  # Yellow
-        draw_text("MISSION COMPLETE", 350, 750, GLUT_BITMAP_TIMES_ROMAN_24)
+        draw_hud_text("MISSION COMPLETE", 350, 750, GLUT_BITMAP_TIMES_ROMAN_24)
     
-    if show_game_end:
+    if game.show_game_end:
         glColor3f(1, 0.5, 0)  # Orange
-        draw_text("THE GAME END", 380, 710, GLUT_BITMAP_TIMES_ROMAN_24)
+        draw_hud_text("THE GAME END", 380, 710, GLUT_BITMAP_TIMES_ROMAN_24)
     
+    if simulation.show_profiler:
+        draw_profiler_overlay()
+    
+    if show_gl_counters:
+        draw_gl_counter_overlay()
+    
+    end_hud()
+    
+    check_gl_object_leaks()
+    simulation.profile_phase('swap')
     glutSwapBuffers()
+    simulation.end_profiled_frame()
 
 
 def keyboardListener(key, x, y):
     """Handle keyboard press"""
-    global lasso_attacking, lasso_attack_timer, woody_health, game_state, selected_level
+    global selected_level, show_cull_stats, show_gl_counters
     
-    # Level selection with keyboard (1, 2, 3 keys)
-    if game_state == "level_select":
-        if key == b'1':
-            selected_level = 1
-            game_state = "fade"
-            return
-        elif key == b'2':
-            selected_level = 2
-            game_state = "fade"
-            return
-        elif key == b'3':
-            selected_level = 3
-            game_state = "fade"
+    # Level selection with keyboard (1-9 keys, for the levels that exist)
+    if game.game_state == "level_select":
+        if key.isdigit() and int(key) in level_configs:
+            selected_level = int(key)
+            game.game_state = "fade"
             return
     
-    # Game controls
+    # Game controls - the press is latched until the next simulation step starts the lasso swing,
+    # so a tap released before that tick still swings
     if key == b'a' or key == b'A':
-        if not lasso_attacking:
-            lasso_attacking = True
-            lasso_attack_timer = 0
-            keys_pressed['a'] = True
+        keys_pressed['a'] = True
     
     # J key for Jessie special power
     if key == b'j' or key == b'J':
@@ -3022,15 +3215,26 @@ def keyboardListener(key, x, y):
     if key == b'b' or key == b'B':
         keys_pressed['b'] = True
     
-    # Test key to reduce health (H key)
+    # C key toggles the culling counters
+    if key == b'c' or key == b'C':
+        show_cull_stats = not show_cull_stats
+    
+    # G key toggles the GL call counters (always counting while --gl-counters is exporting)
+    if key == b'g' or key == b'G':
+        show_gl_counters = not show_gl_counters
+        if show_gl_counters:
+            start_gl_counters()
+        elif gl_counter_path is None:
+            stop_gl_counters()
+    
+    # P key toggles the frame profiler
+    if key == b'p' or key == b'P':
+        simulation.show_profiler = not simulation.show_profiler
+        simulation.profile_history.clear()
+    
+    # Test key to reduce health (H key) - applied by the next simulation step, so it is recorded
     if key == b'h' or key == b'H':
-        woody_health -= 5  # Simulate enemy hit
-
-
-def keyboardUpListener(key, x, y):
-    """Handle keyboard release"""
-    if key == b'a' or key == b'A':
-        keys_pressed['a'] = False
+        keys_pressed['h'] = True
 
 
 def specialKeyListener(key, x, y):
@@ -3059,35 +3263,191 @@ def specialKeyUpListener(key, x, y):
 
 def mouseListener(button, state, x, y):
     """Handle mouse clicks"""
-    global game_state, selected_level
+    global selected_level
     
     # Convert y coordinate (GLUT uses top-left origin, we need bottom-left)
     y = 800 - y
     
-    if game_state == "menu" and button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+    if game.game_state == "menu" and button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
         # Click anywhere on start screen to go to level select
-        game_state = "level_select"
+        game.game_state = "level_select"
     
-    elif game_state == "level_select" and button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
+    elif game.game_state == "level_select" and button == GLUT_LEFT_BUTTON and state == GLUT_DOWN:
         # Check if clicked on any of the three level boxes
+        clicked = None
         # Box 1 (Red): x 175-325, y 300-500
         if 175 <= x <= 325 and 300 <= y <= 500:
-            selected_level = 1
-            game_state = "fade"
+            clicked = 1
         # Box 2 (Green): x 425-575, y 300-500
         elif 425 <= x <= 575 and 300 <= y <= 500:
-            selected_level = 2
-            game_state = "fade"
+            clicked = 2
         # Box 3 (Blue): x 675-825, y 300-500
         elif 675 <= x <= 825 and 300 <= y <= 500:
-            selected_level = 3
-            game_state = "fade"
+            clicked = 3
+        if clicked in level_configs:
+            selected_level = clicked
+            game.game_state = "fade"
+
+
+def capture_tick_state():
+    """Positions of the objects drawn with interpolation"""
+    bensons = game.room_bensons.get(game.current_room, [])
+    if isinstance(bensons, EnemyArrays):
+        benson_positions = (bensons.x.copy(), bensons.y.copy())
+    else:
+        benson_positions = [(benson[0], benson[1]) for benson in bensons]
+    return {
+        'room': game.current_room,
+        'woody': (game.woody_x, game.woody_y, game.woody_z, game.woody_angle),
+        'bensons': benson_positions,
+        'gabby': (game.gabby_x, game.gabby_y),
+    }
+
+
+def lerp(a, b, t):
+    """Linear interpolation from a to b"""
+    return a + (b - a) * t
+
+
+def lerp_angle(a, b, t):
+    """Interpolate angles in degrees the short way round"""
+    return a + ((b - a + 180) % 360 - 180) * t
+
+
+def near(ax, ay, bx, by):
+    """True if two positions are close enough to blend between"""
+    return abs(ax - bx) + abs(ay - by) < INTERPOLATION_SNAP_DISTANCE
+
+
+def apply_render_interpolation():
+    """Move drawn objects back between the previous and latest tick; returns the state to restore"""
+    previous = previous_tick_state
+    if previous is None or render_alpha >= 1.0 or previous['room'] != game.current_room:
+        return None
+    
+    latest = capture_tick_state()
+    t = render_alpha
+    
+    x, y, z, angle = previous['woody']
+    if near(x, y, game.woody_x, game.woody_y):
+        game.woody_x = lerp(x, game.woody_x, t)
+        game.woody_y = lerp(y, game.woody_y, t)
+        game.woody_z = lerp(z, game.woody_z, t)
+        game.woody_angle = lerp_angle(angle, game.woody_angle, t)
+    
+    bensons = game.room_bensons.get(game.current_room, [])
+    if isinstance(bensons, EnemyArrays):
+        # Whole columns at once
+        x, y = previous['bensons']
+        if len(x) == len(bensons):
+            blend = abs(x - bensons.x) + abs(y - bensons.y) < INTERPOLATION_SNAP_DISTANCE
+            bensons.x[blend] = lerp(x[blend], bensons.x[blend], t)
+            bensons.y[blend] = lerp(y[blend], bensons.y[blend], t)
+    else:
+        for benson, (x, y) in zip(bensons, previous['bensons']):
+            if near(x, y, benson[0], benson[1]):
+                benson[0] = lerp(x, benson[0], t)
+                benson[1] = lerp(y, benson[1], t)
+    
+    x, y = previous['gabby']
+    if near(x, y, game.gabby_x, game.gabby_y):
+        game.gabby_x = lerp(x, game.gabby_x, t)
+        game.gabby_y = lerp(y, game.gabby_y, t)
+    
+    return latest
+
+
+def restore_tick_state(state):
+    """Put back the simulated positions after drawing an interpolated frame"""
+    if state is None:
+        return
+    
+    game.woody_x, game.woody_y, game.woody_z, game.woody_angle = state['woody']
+    bensons = game.room_bensons.get(game.current_room, [])
+    if isinstance(bensons, EnemyArrays):
+        bensons.x[:], bensons.y[:] = state['bensons']
+    else:
+        for benson, (x, y) in zip(bensons, state['bensons']):
+            benson[0] = x
+            benson[1] = y
+    game.gabby_x, game.gabby_y = state['gabby']
+
+
+def simulation_tick():
+    """Advance the game by one fixed step"""
+    global fade_timer, previous_tick_state, input_recorder
+    
+    if autopilot is not None:
+        autopilot_tick()
+    
+    if game.game_state == "playing":
+        previous_tick_state = capture_tick_state()
+        if autopilot is not None:
+            keys_pressed.update(autopilot.inputs(game))
+        if input_recorder is not None:
+            input_recorder.record(keys_pressed)
+        game.step(keys_pressed)
+    
+    elif game.game_state == "fade":
+        fade_timer += 1
+        if fade_timer > 30:  # Fade duration
+            # Initialize the selected level
+            game.start_level(selected_level)
+            fade_timer = 0
+            previous_tick_state = None
+            if recording_path is not None:
+                input_recorder = simulation.InputRecorder(selected_level, game.level_seed)
+
+
+def start_autopilot_game():
+    """Start a new autopilot demo game on the selected level"""
+    global autopilot, autopilot_clock, autopilot_games, autopilot_idle_ticks, previous_tick_state
+    game.start_level(selected_level, autopilot_games)
+    autopilot = simulation.AutopilotPlayer(autopilot_games)
+    autopilot_clock = simulation.RoomClock(game)
+    autopilot_games += 1
+    autopilot_idle_ticks = 0
+    previous_tick_state = None
+
+
+def autopilot_tick():
+    """Report rooms the autopilot cleared last tick, and restart a while after the game ends"""
+    global autopilot_clock, autopilot_idle_ticks
+    if autopilot_clock.level != game.current_level:
+        autopilot_clock = simulation.RoomClock(game)  # The game moved on to the next level
+    
+    cleared = len(autopilot_clock.room_ticks)
+    autopilot_clock.update(game)
+    for room in range(cleared, len(autopilot_clock.room_ticks)):
+        print(f"Autopilot: level {autopilot_clock.level} room {room + 1}/{game.total_rooms} "
+              f"cleared in {autopilot_clock.room_ticks[room]} ticks")
+    
+    if game.game_state == "game_over" or game.show_game_end:
+        autopilot_idle_ticks += 1
+        if autopilot_idle_ticks > AUTOPILOT_RESTART_TICKS:
+            start_autopilot_game()
 
 
 def idle():
-    """Idle function for continuous updates"""
-    if game_state == "playing":
-        update_game()
+    """Idle function - run the simulation ticks that are due, then redraw"""
+    global simulation_accumulator, last_idle_time, render_alpha
+    
+    now = time.perf_counter()
+    if last_idle_time is None:
+        last_idle_time = now
+    simulation_accumulator += now - last_idle_time
+    last_idle_time = now
+    
+    steps = 0
+    while simulation_accumulator >= SIMULATION_STEP and steps < MAX_CATCH_UP_STEPS:
+        simulation_tick()
+        simulation_accumulator -= SIMULATION_STEP
+        steps += 1
+    if steps == MAX_CATCH_UP_STEPS:
+        # Too far behind - drop the backlog rather than spending every frame catching up
+        simulation_accumulator = min(simulation_accumulator, SIMULATION_STEP)
+    
+    render_alpha = min(1.0, simulation_accumulator / SIMULATION_STEP)
     glutPostRedisplay()
 
 
@@ -3097,12 +3457,377 @@ def init():
     glEnable(GL_DEPTH_TEST)
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(45, 1.25, 0.1, 2000)
+    gluPerspective(camera_fov, camera_aspect, camera_near, camera_far)
     glMatrixMode(GL_MODELVIEW)
+    
+    # Optional fast paths that depend on what the context supports
+    init_benson_instancing()
+    bake_character_models()
+    init_text_rendering()
+
+
+# Headless rendering - no GLUT window, frames go to an offscreen framebuffer
+headless_shapes = {}  # (shape, args) -> (vertex array, vertex count)
+BENCHMARK_CAMERA_PATHS = ('static', 'walk', 'orbit')
+
+
+def draw_headless_shape(key, make_triangles, *args):
+    """Draw a cached software-tessellated GLUT shape with client vertex arrays"""
+    shape = headless_shapes.get(key)
+    if shape is None:
+        triangles = make_triangles(*args)
+        shape = (float_array([value for vertex in triangles for value in vertex]), len(triangles))
+        headless_shapes[key] = shape
+    vertices, vertex_count = shape
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(3, GL_FLOAT, 0, vertices)
+    glDrawArrays(GL_TRIANGLES, 0, vertex_count)
+    glDisableClientState(GL_VERTEX_ARRAY)
+
+
+def headless_solid_cube(size):
+    """glutSolidCube replacement (GLUT shapes need a GLUT window)"""
+    draw_headless_shape(('cube', size), cube_triangles, size)
+
+
+def headless_solid_sphere(radius, slices, stacks):
+    """glutSolidSphere replacement"""
+    draw_headless_shape(('sphere', radius, slices, stacks), sphere_triangles, radius, slices, stacks)
+
+
+def headless_solid_torus(inner_radius, outer_radius, sides, rings):
+    """glutSolidTorus replacement"""
+    draw_headless_shape(('torus', inner_radius, outer_radius, sides, rings), torus_triangles,
+                        inner_radius, outer_radius, sides, rings)
+
+
+def headless_wire_cube(size):
+    """glutWireCube replacement"""
+    h = size / 2.0
+    corners = [(x, y, z) for x in (-h, h) for y in (-h, h) for z in (-h, h)]
+    glBegin(GL_LINES)
+    for i, a in enumerate(corners):
+        for b in corners[i + 1:]:
+            # Edges join corners that differ in exactly one axis
+            if sum(1 for p, q in zip(a, b) if p != q) == 1:
+                glVertex3f(*a)
+                glVertex3f(*b)
+    glEnd()
+
+
+def headless_bitmap_character(font, character):
+    """glutBitmapCharacter replacement - a solid box per glyph so text still costs a quad"""
+    width = headless_bitmap_width(font, character)
+    if character != ord(' '):
+        height = headless_bitmap_height(font) * 2 // 3
+        row_bytes = (width + 7) // 8
+        glBitmap(width - 1, height, 0, 0, width, 0, bytes([0xff] * (row_bytes * height)))
+    else:
+        glBitmap(0, 0, 0, 0, width, 0, None)
+
+
+def headless_bitmap_width(font, character):
+    """glutBitmapWidth replacement - fixed advance scaled to the font size"""
+    return headless_bitmap_height(font) // 2
+
+
+def headless_bitmap_height(font):
+    """glutBitmapHeight replacement"""
+    return {font_key(GLUT_BITMAP_HELVETICA_12): 15,
+            font_key(GLUT_BITMAP_HELVETICA_18): 22,
+            font_key(GLUT_BITMAP_TIMES_ROMAN_24): 28}.get(font_key(font), 22)
+
+
+def init_headless(width=1000, height=800):
+    """Create a windowless EGL context rendering into an offscreen framebuffer (Mesa llvmpipe works)"""
+    from OpenGL import EGL
+    
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("EGL initialization failed (set EGL_PLATFORM=surfaceless)")
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    # No config and no surface - EGL_KHR_no_config_context + EGL_KHR_surfaceless_context
+    context = EGL.eglCreateContext(display, EGL.EGLConfig(), EGL.EGL_NO_CONTEXT, None)
+    if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+        raise RuntimeError("Could not create a surfaceless OpenGL context")
+    
+    # Color + depth renderbuffers stand in for the window
+    framebuffer = glGenFramebuffers(1)
+    color_buffer, depth_buffer = glGenRenderbuffers(2)
+    glBindRenderbuffer(GL_RENDERBUFFER, color_buffer)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+    glBindRenderbuffer(GL_RENDERBUFFER, depth_buffer)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+    glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color_buffer)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth_buffer)
+    if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+        raise RuntimeError("Offscreen framebuffer is incomplete")
+    glViewport(0, 0, width, height)
+    
+    # GLUT entry points that need a window get software replacements
+    globals().update({
+        'glutSolidCube': headless_solid_cube,
+        'glutSolidSphere': headless_solid_sphere,
+        'glutSolidTorus': headless_solid_torus,
+        'glutWireCube': headless_wire_cube,
+        'glutBitmapCharacter': headless_bitmap_character,
+        'glutBitmapWidth': headless_bitmap_width,
+        'glutBitmapHeight': headless_bitmap_height,
+        'glutSwapBuffers': glFinish,  # Wait for the frame so its time is measured
+        'glutPostRedisplay': lambda: None,
+    })
+    
+    # Text rendering binds framebuffer 0 when done - keep drawing into ours
+    init()
+    glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+    glViewport(0, 0, width, height)
+    print(f"Headless renderer: {glGetString(GL_RENDERER).decode()} ({glGetString(GL_VERSION).decode()})")
+
+
+def set_benchmark_camera(camera_path, t):
+    """Place Woody (the camera follows him) along a camera path at t in [0, 1)"""
+    game.woody_x = 0
+    if camera_path == 'walk':
+        # Walk from the back door to the front door
+        game.woody_y = 280 - 560 * t
+        game.woody_angle = 270
+    elif camera_path == 'orbit':
+        # Turn a full circle in the middle of the room
+        game.woody_y = 100
+        game.woody_angle = 270 + 360 * t
+    else:
+        game.woody_y = 100
+        game.woody_angle = 270
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def run_render_benchmark(level, room, camera_path, frames, warmup):
+    """Render frames through showScreen() and report frame-time percentiles"""
+    game.start_level(level)
+    game.current_room = min(room, game.total_rooms - 1)
+    game.load_room(game.current_room)
+    
+    # Bullet hell runs the boss fight for real, with Woody unable to run out of lives
+    tick_times = []
+    if simulation.bullet_hell:
+        game.current_room = game.total_rooms - 1
+        game.enter_boss_room()
+        game.woody_lives = 10**9
+    
+    frame_times = []
+    for frame in range(warmup + frames):
+        if simulation.bullet_hell:
+            start = time.perf_counter()
+            game.step(dict(keys_pressed))
+            if frame >= warmup:
+                tick_times.append((time.perf_counter() - start) * 1000.0)
+        set_benchmark_camera(camera_path, frame / max(1, frames))
+        start = time.perf_counter()
+        showScreen()
+        elapsed = time.perf_counter() - start
+        if frame >= warmup:
+            frame_times.append(elapsed * 1000.0)
+    
+    frame_times.sort()
+    mean = sum(frame_times) / len(frame_times)
+    print(f"Level {level}, room {game.current_room + 1}/{game.total_rooms}, camera path '{camera_path}', "
+          f"{frames} frames ({warmup} warmup)")
+    print(f"  mean {mean:.2f} ms ({1000.0 / mean:.1f} FPS)")
+    for label, fraction in (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99)):
+        print(f"  {label}  {percentile(frame_times, fraction):.2f} ms")
+    print(f"  min  {frame_times[0]:.2f} ms, max {frame_times[-1]:.2f} ms")
+    if tick_times:
+        tick_times.sort()
+        print(f"  simulation mean {sum(tick_times) / len(tick_times):.2f} ms/tick, "
+              f"p99 {percentile(tick_times, 0.99):.2f} ms, {len(game.cup_projectiles)} projectiles in flight")
+
+
+def save_input_recording():
+    """Write the latest game's recording to the --record file"""
+    if input_recorder is not None:
+        recording = input_recorder.recording(game)
+        simulation.save_recording(recording_path, recording)
+        print(f"Recorded {recording['ticks']} ticks to {recording_path}")
+
+
+def run_replay(recording):
+    """Replay a loaded recording at full speed with no rendering and check it ends the same way"""
+    start = time.perf_counter()
+    replayed = simulation.replay_recording(recording)
+    elapsed = time.perf_counter() - start
+    
+    result = simulation.game_result(replayed)
+    print(f"Replayed {recording['ticks']} ticks of level {recording['level']} (seed {recording['seed']}) "
+          f"in {elapsed:.2f} s ({recording['ticks'] / max(elapsed, 1e-9):.0f} ticks/s)")
+    for field, expected in recording['result'].items():
+        status = "ok" if result[field] == expected else "MISMATCH"
+        print(f"  {field:6} {result[field]!s:>10}  recorded {expected!s:>10}  {status}")
+    return result == recording['result']
+
+
+def run_simulation_benchmark_report(ticks, warmup, names, json_path):
+    """Run the simulation benchmarks, print a table and optionally write the JSON report"""
+    report = simulation.run_simulation_benchmarks(ticks, warmup, names)
+    print(f"Simulation benchmarks - {ticks} ticks after {warmup} warmup, seed {report['seed']}, "
+          f"Python {report['python']}, NumPy {report['numpy'] or 'not installed'}")
+    print(f"{'scenario':<24} {'ns/tick':>11} {'p50':>11} {'p99':>11} {'max':>11} {'alloc B/tick':>13} {'net blocks':>11}")
+    for result in report['scenarios']:
+        print(f"{result['name']:<24} {result['ns_per_tick']:>11} {result['p50_ns']:>11} {result['p99_ns']:>11} "
+              f"{result['max_ns']:>11} {result['alloc_bytes_per_tick']:>13} {result['net_blocks_per_tick']:>11}")
+    if json_path:
+        with open(json_path, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Wrote {json_path}")
+
+
+def run_batch_report(levels, seeds, player, max_ticks, workers, levels_directory):
+    """Run a batch of seeded headless games over a process pool and print a summary table per level"""
+    summary = simulation.BatchSummary()
+    total_ticks = 0
+    start = time.perf_counter()
+    for record in simulation.run_batch(levels, seeds, player, max_ticks, workers, levels_directory):
+        summary.add(record)
+        total_ticks += record[3]
+    elapsed = time.perf_counter() - start
+    
+    games = len(levels) * len(seeds)
+    print(f"{games} games ({len(seeds)} seeds x {len(levels)} levels, player '{player}') in {elapsed:.1f} s - "
+          f"{games / max(elapsed, 1e-9):.1f} games/s, {total_ticks / max(elapsed, 1e-9):.0f} ticks/s")
+    print(f"{'level':>5} {'runs':>6} {'cleared':>8} {'died':>6} {'timeout':>8} {'clear ticks p50':>16} {'p90':>7} "
+          f"{'score mean':>11} {'sd':>7} {'min':>6} {'max':>6} {'lives':>6} {'rooms':>6}")
+    for row in summary.rows():
+        median = '-' if row['clear_ticks_median'] is None else f"{row['clear_ticks_median']:.0f}"
+        p90 = '-' if row['clear_ticks_p90'] is None else f"{row['clear_ticks_p90']}"
+        print(f"{row['level']:>5} {row['runs']:>6} {row['cleared']:>8.1%} {row['died']:>6.1%} {row['timeout']:>8.1%} "
+              f"{median:>16} {p90:>7} {row['score_mean']:>11.1f} {row['score_stdev']:>7.1f} "
+              f"{row['score_min']:>6} {row['score_max']:>6} {row['lives_mean']:>6.2f} {row['rooms_mean']:>6.1f}")
+    for row in summary.rows():
+        if row['room_ticks_median']:
+            print(f"Level {row['level']} median ticks to clear each room: "
+                  + ", ".join(f"{ticks:.0f}" for ticks in row['room_ticks_median']))
+
+
+def run_autopilot_headless(levels, seed, max_ticks):
+    """Play levels with the autopilot at full speed, no window, and report ticks to clear each room"""
+    for level in levels:
+        start = time.perf_counter()
+        record = simulation.play_seed((level, seed, 'autopilot', max_ticks))
+        elapsed = time.perf_counter() - start
+        
+        _, _, outcome, ticks, score, lives, rooms, room_ticks = record
+        print(f"Level {level} (seed {seed}): {simulation.BATCH_OUTCOMES[outcome]} after {ticks} ticks "
+              f"({ticks / simulation.TICKS_PER_SECOND:.0f} s of play) in {elapsed:.2f} s ({ticks / max(elapsed, 1e-9):.0f} ticks/s), "
+              f"score {score}, {lives} lives left")
+        for room, room_clear_ticks in enumerate(room_ticks):
+            print(f"  room {room + 1:>3}/{level_configs[level]['total_rooms']}  {room_clear_ticks:>6} ticks")
+        if len(room_ticks) < rooms:
+            print(f"  room {rooms:>3}/{level_configs[level]['total_rooms']}  not cleared")
 
 
 def main():
     """Main function"""
+    global recording_path, game, selected_level, gl_counter_path
+    
+    parser = argparse.ArgumentParser(description="Toy Story Adventure - Rescue Bo Peep")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="render frames headless (EGL, no display or GPU needed) and report frame times")
+    parser.add_argument('--frames', type=int, default=300, help="benchmark frames to measure")
+    parser.add_argument('--warmup', type=int, default=30, help="frames rendered (or --sim-benchmark ticks) before measuring")
+    parser.add_argument('--level', type=int, help="benchmark level (default 1), or the only level of a --batch or --autopilot run")
+    parser.add_argument('--room', type=int, default=1, help="benchmark room (1 = first)")
+    parser.add_argument('--camera-path', choices=BENCHMARK_CAMERA_PATHS, default='walk',
+                        help="how the camera moves through the room")
+    parser.add_argument('--bullet-hell', action='store_true',
+                        help="stress boss that fires rings of thousands of cups, balls and sticks")
+    parser.add_argument('--sim-benchmark', action='store_true',
+                        help="time simulation ticks over fixed-seed scenarios (enemies, coins, projectiles, powers, win)")
+    parser.add_argument('--ticks', type=int, default=300, help="--sim-benchmark ticks to measure per scenario")
+    parser.add_argument('--scenario', action='append', metavar='NAME',
+                        help="only run --sim-benchmark scenarios whose name contains NAME (repeatable)")
+    parser.add_argument('--json', metavar='FILE', help="also write the --sim-benchmark report to FILE as JSON")
+    parser.add_argument('--gl-counters', metavar='FILE',
+                        help="count GL calls per frame and per draw function, and write them to FILE as JSON "
+                             "(at exit, or after a --benchmark)")
+    parser.add_argument('--record', metavar='FILE', help="record the keys of every tick to FILE for --replay")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="replay a recording headless at full speed and check its final score, lives and room")
+    parser.add_argument('--levels', metavar='DIR', help="load the level files of DIR instead of the bundled levels")
+    parser.add_argument('--batch', type=int, metavar='SEEDS',
+                        help="play SEEDS seeded games of every level headless with a scripted player and summarize them")
+    parser.add_argument('--first-seed', type=int, default=0,
+                        help="seed of the first --batch game, or of the --autopilot headless games")
+    parser.add_argument('--player', choices=sorted(simulation.PLAYERS), default='wander', help="--batch player")
+    parser.add_argument('--max-ticks', type=int, default=simulation.BATCH_MAX_TICKS,
+                        help="--batch games still going after this many ticks count as timeouts")
+    parser.add_argument('--workers', type=int, help="--batch worker processes (default one per core)")
+    parser.add_argument('--autopilot', nargs='?', const='demo', choices=('demo', 'headless'),
+                        help="let the autopilot play - 'demo' in the window (restarting when the game ends), "
+                             "'headless' at full speed with ticks to clear each room")
+    parser.add_argument('--autosave', metavar='FILE', help="save a snapshot of the game to FILE on every room change")
+    parser.add_argument('--resume', metavar='FILE', help="carry on playing from a snapshot saved by --autosave")
+    args = parser.parse_args()
+    simulation.bullet_hell = args.bullet_hell
+    if args.levels:
+        try:
+            simulation.use_levels(args.levels)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot load levels: {error}")
+    if args.level is not None and args.level not in level_configs:
+        parser.error(f"--level must be one of {', '.join(str(level) for level in sorted(level_configs))}")
+    if args.resume and args.record:
+        # A recording replays from the start of a level, which a resumed game never passes through
+        parser.error("--record cannot be used with --resume")
+    
+    if args.replay:
+        try:
+            recording = simulation.load_recording(args.replay)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot replay: {error}")
+        sys.exit(0 if run_replay(recording) else 1)
+    
+    if args.sim_benchmark:
+        run_simulation_benchmark_report(max(1, args.ticks), args.warmup, args.scenario, args.json)
+        return
+    
+    if args.batch:
+        levels = [args.level] if args.level is not None else sorted(level_configs)
+        seeds = range(args.first_seed, args.first_seed + args.batch)
+        run_batch_report(levels, seeds, args.player, args.max_ticks, args.workers, args.levels)
+        return
+    
+    if args.autopilot == 'headless':
+        levels = [args.level] if args.level is not None else sorted(level_configs)
+        run_autopilot_headless(levels, args.first_seed, args.max_ticks)
+        return
+    
+    if args.resume:
+        try:
+            game = simulation.read_snapshot(args.resume)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot resume from {args.resume}: {error}")
+        selected_level = game.current_level
+    game.autosave_path = args.autosave
+    
+    if args.record:
+        recording_path = args.record
+        atexit.register(save_input_recording)
+    
+    if args.benchmark:
+        init_headless()
+        if args.gl_counters:
+            start_gl_counters()  # After init_headless() has put in its software GLUT shapes
+        run_render_benchmark(args.level or 1, args.room - 1, args.camera_path, max(1, args.frames), args.warmup)
+        if args.gl_counters:
+            write_gl_counters(args.gl_counters)
+            print_gl_counters(summarize_gl_counts(gl_total_counts, gl_counted_frames))
+        return
+    
     glutInit()
     glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
     glutInitWindowSize(1000, 800)
@@ -3110,10 +3835,16 @@ def main():
     glutCreateWindow(b"Toy Story Adventure - Rescue Bo Peep")
     
     init()
+    if args.gl_counters:
+        gl_counter_path = args.gl_counters
+        start_gl_counters()
+        atexit.register(write_gl_counters, gl_counter_path)
+    if args.autopilot == 'demo':
+        selected_level = args.level or selected_level
+        start_autopilot_game()
     
     glutDisplayFunc(showScreen)
     glutKeyboardFunc(keyboardListener)
-    glutKeyboardUpFunc(keyboardUpListener)
     glutSpecialFunc(specialKeyListener)
     glutSpecialUpFunc(specialKeyUpListener)
     glutMouseFunc(mouseListener)
@@ -0,0 +1,379 @@
+"""Headless checks of the game logic - no OpenGL needed (run with pytest)"""
+import json
+import marshal
+import math
+import os
+import random
+import shutil
+
+import pytest
+
+import group5_ToyStorySimulation as simulation
+
+needs_numpy = pytest.mark.skipif(simulation.np is None, reason="needs NumPy")
+
+
+def random_inputs(rng):
+    """Mostly walking and swinging, with the odd power key"""
+    return {key: rng.random() < (0.02 if key in ('j', 'b') else 0.3)
+            for key in ('up', 'down', 'left', 'right', 'a', 'j', 'b')}
+
+
+def crowded_game(count=64):
+    """Level 1 with count Bensons scattered over room 0, where Woody starts"""
+    game = simulation.GameState()
+    game.start_level(1)
+    rng = random.Random(2)
+    game.room_bensons[0] = simulation.make_enemy_store([[rng.uniform(-280, 280), rng.uniform(-280, 280), True, 0]
+                                                        for _ in range(count)])
+    return game
+
+
+def enemy_values(bensons):
+    """A room's enemies flattened to floats, whatever the store, for pytest.approx"""
+    return [float(value) for benson in bensons for value in (benson[0], benson[1], benson[2], benson[3])]
+
+
+@needs_numpy
+def test_enemy_arrays_match_enemy_lists(monkeypatch):
+    runs = []
+    for arrays in (False, True):
+        monkeypatch.setattr(simulation, 'use_enemy_arrays', arrays)
+        random.seed(1)
+        game = crowded_game()
+        assert isinstance(game.room_bensons[0], simulation.EnemyArrays) == arrays
+        rng = random.Random(3)
+        states = []
+        for _ in range(300):
+            game.step(random_inputs(rng))
+            states.append(((game.woody_x, game.woody_y, game.woody_health, game.woody_lives, game.woody_score),
+                           enemy_values(game.room_bensons[0])))
+        runs.append(states)
+    lists, arrays = runs
+    assert [woody for woody, _ in arrays] == [woody for woody, _ in lists]
+    assert lists[-1][0][2:] != lists[0][0][2:] or lists[-1][0][4] > 0  # Bensons and the lasso did something
+    for tick, ((_, array_enemies), (_, list_enemies)) in enumerate(zip(arrays, lists)):
+        assert array_enemies == pytest.approx(list_enemies), f"tick {tick}"
+
+
+def test_spatial_hash_query_finds_every_key_in_range():
+    rng = random.Random(3)
+    grid = simulation.SpatialHash()
+    points = {}
+    for key in range(300):
+        points[key] = (rng.uniform(-300, 300), rng.uniform(-300, 300))
+        grid.insert(key, *points[key])
+    for key in range(0, 300, 3):
+        points[key] = (rng.uniform(-300, 300), rng.uniform(-300, 300))
+        grid.move(key, *points[key])
+    for key in range(0, 300, 7):
+        grid.remove(key)
+        del points[key]
+    grid.remove('missing')
+    
+    # Every key sits in exactly the bucket of its position
+    assert sorted(key for bucket in grid.cells.values() for key in bucket) == sorted(points)
+    for key, (x, y) in points.items():
+        assert key in grid.cells[grid.cell_of(x, y)]
+    
+    for _ in range(200):
+        x, y, radius = rng.uniform(-320, 320), rng.uniform(-320, 320), rng.uniform(0, 80)
+        found = grid.query(x, y, radius)
+        assert len(found) == len(set(found))
+        assert set(found) <= set(points)
+        assert {key for key, (px, py) in points.items() if math.hypot(px - x, py - y) <= radius} <= set(found)
+
+
+@needs_numpy
+@pytest.mark.parametrize('room_pattern', range(5))
+def test_furniture_grid_matches_brute_force_and_arrays(room_pattern):
+    obstacles = simulation.get_furniture_obstacles(room_pattern)
+    furniture = simulation.FurnitureGrid(obstacles)
+    rng = random.Random(room_pattern)
+    # Half the points inside furniture boxes, where resolve() has to pick a side
+    xs, ys = [], []
+    for i in range(2000):
+        if i % 2 and obstacles:
+            ox, oy, width, height = rng.choice(obstacles)
+            xs.append(ox + rng.uniform(-width / 2, width / 2))
+            ys.append(oy + rng.uniform(-height / 2, height / 2))
+        else:
+            xs.append(rng.uniform(-300, 300))
+            ys.append(rng.uniform(-300, 300))
+    
+    radius = simulation.BENSON_RADIUS
+    assert [furniture.collides(x, y, radius) for x, y in zip(xs, ys)] == \
+        [simulation.check_collision_with_furniture(x, y, radius, obstacles) for x, y in zip(xs, ys)]
+    
+    resolved = [furniture.resolve(x, y, radius) for x, y in zip(xs, ys)]
+    x_column = simulation.np.array(xs)
+    y_column = simulation.np.array(ys)
+    furniture.resolve_arrays(x_column, y_column, simulation.np.arange(len(xs)), radius)
+    assert [value for point in resolved for value in point] == \
+        pytest.approx([value for point in zip(x_column.tolist(), y_column.tolist()) for value in point])
+
+
+def test_flow_field_routes_around_a_wall():
+    # A wall across the middle of the room, with the shorter way round at its left end
+    furniture = simulation.FurnitureGrid([(40, 0, 440, 20)])
+    field = simulation.FlowField(furniture)
+    woody = (0, 150)
+    field.retarget(*woody)
+    target = field.cell_index(*woody)
+    
+    # Right behind the wall the way to Woody is round it, not straight through it
+    assert field.steer(0, -60) is not None
+    index = field.cell_index(0, -60)
+    for _ in range(field.size * field.size):
+        if index == target or field.direct[index]:
+            break
+        cell_x, cell_y = divmod(index, field.size)
+        index = (cell_x + round(field.steer_x[index] * math.sqrt(2))) * field.size + \
+            cell_y + round(field.steer_y[index] * math.sqrt(2))
+        assert not field.blocked[index]
+        assert field.cell_center(index)[0] < 260  # Never round the longer right-hand end
+    assert index == target
+    
+    # Retargeting within the same cell keeps the field, moving Woody rebuilds it
+    field.retarget(woody[0] + 1, woody[1])
+    assert field.target == target
+    field.retarget(0, -150)
+    assert field.target == field.cell_index(0, -150) and field.steer(0, -60) == (0.0, -1.0)
+
+
+def projectile_values(pool):
+    """The live projectiles of a pool, sorted (removal order differs between the two paths) and flattened
+    so pytest.approx can compare them - NumPy's cos and sin can be an ulp off math's"""
+    rows = sorted((int(pool.kind[i]), round(float(pool.dx[i]), 6), round(float(pool.dy[i]), 6), i)
+                  for i in range(pool.count))
+    return [float(value) for _, _, _, i in rows
+            for value in (pool.x[i], pool.y[i], pool.dx[i], pool.dy[i], pool.lifetime[i], pool.kind[i])]
+
+
+@needs_numpy
+def test_projectile_pool_numpy_matches_lists(monkeypatch):
+    furniture = simulation.get_furniture_grid(1)
+    numpy = simulation.np
+    pools = []
+    for pool_numpy in (numpy, None):
+        monkeypatch.setattr(simulation, 'np', pool_numpy)
+        pool = simulation.ProjectilePool(200)
+        pool.spawn_ring(0, -200, 150, 3.0, 10)
+        pool.spawn(50, 50, -1.0, 0.5, simulation.PROJECTILE_CUP)
+        pools.append(pool)
+    arrays, lists = pools
+    assert projectile_values(arrays) == pytest.approx(projectile_values(lists))
+    
+    hits = 0
+    for tick in range(400):
+        monkeypatch.setattr(simulation, 'np', None)
+        list_hits = lists.update(0, 0, furniture)
+        monkeypatch.setattr(simulation, 'np', numpy)
+        array_hits = arrays.update(0, 0, furniture)
+        assert array_hits == list_hits, f"tick {tick}"
+        assert projectile_values(arrays) == pytest.approx(projectile_values(lists))
+        hits += array_hits
+    assert hits and not arrays.count  # Projectiles hit the target, the furniture and flew off
+
+
+@needs_numpy
+def test_catch_up_room_arrays_match_lists(monkeypatch):
+    games = []
+    for arrays in (False, True):
+        monkeypatch.setattr(simulation, 'use_enemy_arrays', arrays)
+        game = crowded_game()
+        game.room_bensons[0][5][2] = False  # Lassoed Bensons stay put
+        game.room_last_tick[0] = game.tick
+        game.room_chase_targets[0] = (150, 150)
+        game.tick += 400
+        before = enemy_values(game.room_bensons[0])
+        game.catch_up_room(0)
+        games.append(game)
+    lists, arrays = games
+    assert isinstance(arrays.room_bensons[0], simulation.EnemyArrays)
+    after = enemy_values(lists.room_bensons[0])
+    assert enemy_values(arrays.room_bensons[0]) == pytest.approx(after)
+    
+    furniture = lists.room_furniture(0)
+    assert after[20:24] == before[20:24]
+    for i in range(0, len(after), 4):
+        x, y, active = after[i:i + 3]
+        if active:
+            old_x, old_y = before[i:i + 2]
+            assert math.hypot(150 - x, 150 - y) < math.hypot(150 - old_x, 150 - old_y) or (x, y) == (old_x, old_y)
+            assert not furniture.collides(x, y, simulation.BENSON_RADIUS - 0.01)
+
+
+def test_replay_reproduces_live_game(tmp_path):
+    game = simulation.GameState()
+    game.start_level(1, 5)
+    recorder = simulation.InputRecorder(1, 5)
+    rng = random.Random(4)
+    for _ in range(2000):
+        inputs = random_inputs(rng)
+        recorder.record(inputs)
+        game.step(inputs)
+    recording = recorder.recording(game)
+    assert recording['ticks'] == 2000
+    
+    replayed = simulation.replay_recording(recording)
+    assert simulation.game_result(replayed) == simulation.game_result(game)
+    assert (replayed.woody_x, replayed.woody_y, replayed.woody_angle) == (game.woody_x, game.woody_y, game.woody_angle)
+    path = str(tmp_path / 'game.rec')
+    simulation.save_recording(path, recording)
+    replayed = simulation.replay_recording(simulation.load_recording(path))
+    assert simulation.game_result(replayed) == recording['result']
+
+
+def room_content(game, room):
+    """Everything generate_room() made for a room, as plain values"""
+    return (game.room_star_positions.get(room), game.room_hat_positions.get(room), game.room_coins.get(room),
+            enemy_values(game.room_bensons.get(room, [])))
+
+
+def test_room_content_does_not_depend_on_visit_order():
+    orders = [range(1, 40), range(39, 0, -1), random.Random(4).sample(range(1, 40), 39)]
+    contents = []
+    for order in orders:
+        game = simulation.GameState()
+        game.start_level(2, 11)
+        game.total_rooms = 41
+        content = {0: room_content(game, 0)}
+        for room in order:
+            game.load_room(room)
+            content[room] = room_content(game, room)
+        contents.append(content)
+    assert contents[0] == contents[1] == contents[2]
+    
+    # The same seed on another level is another level
+    other_level = simulation.GameState()
+    other_level.start_level(1, 11)
+    other_level.load_room(1)
+    assert room_content(other_level, 1) != contents[0][1]
+
+
+def test_evicted_room_comes_back_as_left():
+    keys = dict.fromkeys(simulation.RECORDED_KEYS, False)
+    game = simulation.GameState()
+    game.start_level(3)
+    game.woody_lives = 10**6
+    game.current_room = 1
+    game.step(dict(keys))
+    coin = game.room_coins[1][0]
+    game.woody_x, game.woody_y = coin
+    game.step(dict(keys))
+    assert (1, 0) in game.collected_coins
+    score = game.woody_score
+    
+    game.step(dict(keys, b=True))  # Buzz wipes out the room's Bensons
+    for _ in range(400):
+        game.step(dict(keys))
+    assert not any(benson[2] for benson in game.room_bensons[1])
+    
+    for room in range(2, 6):
+        game.current_room = room
+        game.step(dict(keys))
+    assert 1 not in game.generated_rooms
+    
+    game.current_room = 1
+    game.woody_x, game.woody_y = coin
+    for _ in range(3):
+        game.step(dict(keys))
+    assert game.room_coins[1][0] == coin
+    assert not any(benson[2] for benson in game.room_bensons[1])
+    assert game.woody_score == score
+
+
+def test_load_levels_notices_edited_level(tmp_path, monkeypatch):
+    monkeypatch.setattr(simulation, 'LEVEL_CACHE_DIRECTORY', str(tmp_path / 'cache'))
+    directory = tmp_path / 'levels'
+    shutil.copytree(simulation.LEVELS_DIRECTORY, directory, ignore=shutil.ignore_patterns('__pycache__'))
+    levels = simulation.load_levels(str(directory))
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+    assert sorted(os.listdir(directory)) == ['level1.json', 'level2.json', 'level3.json']  # Source tree untouched
+    assert simulation.load_levels(str(directory)) == levels  # Served from the cache
+    
+    path = directory / 'level1.json'
+    level = json.loads(path.read_text())
+    level['boss_health'] += 7
+    level['enemy_name'] += ' (edited)'
+    path.write_text(json.dumps(level))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # Even on coarse clocks
+    
+    edited = simulation.load_levels(str(directory))
+    assert edited[1]['boss_health'] == levels[1]['boss_health'] + 7
+    assert edited[1]['enemy_name'] == levels[1]['enemy_name'] + ' (edited)'
+    assert {number: config for number, config in edited.items() if number != 1} == \
+        {number: config for number, config in levels.items() if number != 1}
+
+
+def snapshot_values(game):
+    """The decoded contents of a snapshot (marshal's byte stream can differ for equal values)"""
+    return marshal.loads(simulation.save_snapshot(game)[simulation.SNAPSHOT_HEADER.size:])
+
+
+def test_snapshot_continues_identically():
+    game = simulation.GameState()
+    game.start_level(3, 7)
+    rng = random.Random(2)
+    for _ in range(1500):
+        game.step(random_inputs(rng))
+    game.cup_projectiles.spawn_ring(0, 0, 40, 2.0, 0)
+    
+    restored = simulation.load_snapshot(simulation.save_snapshot(game))
+    assert snapshot_values(restored) == snapshot_values(game)
+    for _ in range(1500):
+        inputs = random_inputs(rng)
+        game.step(dict(inputs))
+        restored.step(dict(inputs))
+    assert simulation.game_result(restored) == simulation.game_result(game)
+    assert snapshot_values(restored) == snapshot_values(game)
+
+
+def test_run_batch_pool_matches_serial_run():
+    serial = list(simulation.run_batch([1, 2], range(4), max_ticks=600, workers=1))
+    pooled = list(simulation.run_batch([1, 2], range(4), max_ticks=600, workers=2))
+    assert len(serial) == 8
+    assert sorted(pooled) == sorted(serial)
+    
+    summaries = [simulation.BatchSummary(), simulation.BatchSummary()]
+    for records, summary in zip((serial, reversed(pooled)), summaries):
+        for record in records:
+            summary.add(record)
+    assert summaries[0].rows() == summaries[1].rows()
+    assert [row['runs'] for row in summaries[0].rows()] == [4, 4]
+
+
+def test_run_batch_uses_levels_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(simulation, 'LEVEL_CACHE_DIRECTORY', str(tmp_path / 'cache'))
+    monkeypatch.setattr(simulation, 'level_configs', dict(simulation.level_configs))  # use_levels() swaps in place
+    with open(os.path.join(simulation.LEVELS_DIRECTORY, 'level1.json')) as level_file:
+        level = json.load(level_file)
+    level['level'] = 4
+    (tmp_path / 'level4.json').write_text(json.dumps(level))
+    
+    pooled = list(simulation.run_batch([4], range(2), max_ticks=300, workers=2, levels_directory=str(tmp_path)))
+    serial = list(simulation.run_batch([4], range(2), max_ticks=300, workers=1, levels_directory=str(tmp_path)))
+    assert sorted(pooled) == serial
+    assert [record[0] for record in serial] == [4, 4]
+    assert sorted(simulation.level_configs) == [4]
+
+
+def test_autopilot_clears_a_level():
+    _, _, outcome, ticks, _, _, rooms, room_ticks = simulation.play_seed((1, 1, 'autopilot', 36000))
+    assert outcome == simulation.BATCH_CLEARED
+    assert rooms == simulation.level_configs[1]['total_rooms']
+    assert len(room_ticks) == rooms and ticks < 36000  # The boss room included
+
+
+def test_simulation_benchmark_report():
+    report = simulation.run_simulation_benchmarks(ticks=5, warmup=1, names=['coins_', 'win'])
+    assert json.loads(json.dumps(report)) == report
+    assert report['version'] == simulation.BENCHMARK_VERSION and report['warmup'] == 1
+    names = [result['name'] for result in report['scenarios']]
+    assert names == [f"coins_{count}" for count in simulation.BENCHMARK_COIN_COUNTS] + ['win_sequence']
+    for result in report['scenarios']:
+        assert result['ticks'] == 5
+        assert 0 < result['p50_ns'] <= result['p99_ns'] <= result['max_ns']
+        assert result['alloc_bytes_per_tick'] >= 0